@@ -1,125 +1,144 @@
-"""
-MISLG Tools - ComfyUI 自定义工具节点包
-提供空输入输出节点、VAE优化、图像转换、图片切换、模型管理等实用工具
-作者: MISLG
-版本: 1.3.4
-"""
-
-import os
-import sys
-
-# ======================================================
-# 初始化路径
-# ======================================================
-current_dir = os.path.dirname(os.path.abspath(__file__))
-if current_dir not in sys.path:
-    sys.path.append(current_dir)
-
-# ======================================================
-# 导入所有模块
-# ======================================================
-try:
-    from .empty_input_nodes import *
-    from .empty_output_nodes import *
-    from .vae_optimizer import *
-    from .image_converter import *
-    from .utils import *  # 含 MISLG 工具节点模块
-    from .image_switch import *
-    from .model_unloader import *      # 原有的模型卸载模块
-    from .model_unloader_io import *   # 新增带IO接口的模型卸载模块
-    from .instant_preview_loader import * # 即时预览图片加载器与路径助手模块
-    from .ksampler_with_info import *  # ✅ 新增：采样器信息模块
-
-    # ======================================================
-    # 合并节点映射
-    # ======================================================
-    NODE_CLASS_MAPPINGS = {}
-    NODE_DISPLAY_NAME_MAPPINGS = {}
-
-    # 模块列表（用于批量注册）
-    modules = [
-        empty_input_nodes,
-        empty_output_nodes,
-        vae_optimizer,
-        image_converter,
-        utils,              # ✅ 包含 MISLG 工具节点模块
-        image_switch,
-        model_unloader,
-        model_unloader_io,
-        instant_preview_loader, # ✅ 即时预览图片加载器与路径助手模块
-        ksampler_with_info     # ✅ 新增：采样器信息模块
-    ]
-
-    for module in modules:
-        if hasattr(module, 'NODE_CLASS_MAPPINGS'):
-            NODE_CLASS_MAPPINGS.update(module.NODE_CLASS_MAPPINGS)
-        if hasattr(module, 'NODE_DISPLAY_NAME_MAPPINGS'):
-            NODE_DISPLAY_NAME_MAPPINGS.update(module.NODE_DISPLAY_NAME_MAPPINGS)
-
-    # ======================================================
-    # 输出加载信息
-    # ======================================================
-    print(f"✅ MISLG Tools v1.3.4 已成功加载")
-    print(f"   已注册 {len(NODE_CLASS_MAPPINGS)} 个节点")
-    print(f"   新增功能: MISLG 工具节点模块 (双输入自动判断、图像优先、批量合并)")
-    print(f"   新增功能: 即时预览图片加载器与路径助手 (即时预览、路径管理、多模式操作)")
-    print(f"   新增功能: K采样器信息模块 (带详细信息的采样器)")
-
-    if len(NODE_CLASS_MAPPINGS) > 0:
-        print(f"   已加载节点: {', '.join(NODE_CLASS_MAPPINGS.keys())}")
-
-# ======================================================
-# 异常处理
-# ======================================================
-except ImportError as e:
-    print(f"⚠️ MISLG Tools 部分模块导入失败: {e}")
-    print("   请检查依赖文件是否完整。")
-
-    NODE_CLASS_MAPPINGS = {}
-    NODE_DISPLAY_NAME_MAPPINGS = {}
-
-    try:
-        # 尝试加载基础模块
-        from .empty_input_nodes import *
-        from .empty_output_nodes import *
-        from .vae_optimizer import *
-        from .image_converter import *
-        from .utils import *
-        from .image_switch import *
-        from .model_unloader import *
-        from .instant_preview_loader import * # 尝试加载即时预览图片加载器模块
-        from .ksampler_with_info import *    # ✅ 尝试加载采样器信息模块
-
-        modules = [
-            empty_input_nodes,
-            empty_output_nodes,
-            vae_optimizer,
-            image_converter,
-            utils,
-            image_switch,
-            model_unloader,
-            instant_preview_loader, # 尝试加载即时预览图片加载器模块
-            ksampler_with_info     # ✅ 尝试加载采样器信息模块
-        ]
-
-        for module in modules:
-            if hasattr(module, 'NODE_CLASS_MAPPINGS'):
-                NODE_CLASS_MAPPINGS.update(module.NODE_CLASS_MAPPINGS)
-            if hasattr(module, 'NODE_DISPLAY_NAME_MAPPINGS'):
-                NODE_DISPLAY_NAME_MAPPINGS.update(module.NODE_DISPLAY_NAME_MAPPINGS)
-
-        print(f"✅ MISLG Tools 基础功能已加载 ({len(NODE_CLASS_MAPPINGS)} 个节点)")
-    except Exception as e2:
-        print(f"❌ MISLG Tools 完全加载失败: {e2}")
-
-except Exception as e:
-    print(f"❌ MISLG Tools 加载失败: {e}")
-    NODE_CLASS_MAPPINGS = {}
-    NODE_DISPLAY_NAME_MAPPINGS = {}
-
-# ======================================================
-# 模块元信息
-# ======================================================
-__version__ = "1.3.4"
-__author__ = "MISLG"
-__description__ = "MISLG Tools - ComfyUI 自定义工具节点包 (含 MISLG 工具节点模块、即时预览图片加载器、K采样器信息模块)"
\ No newline at end of file
+"""
+MISLG Tools - ComfyUI 自定义工具节点包
+提供空输入输出节点、VAE优化、图像转换、图片切换、模型管理等实用工具
+作者: MISLG
+版本: 1.3.4
+"""
+
+import importlib
+
+# ======================================================
+# 延迟导入
+# ======================================================
+class _LazyNode:
+    """延迟加载的节点代理 - 首次访问属性时才导入真正的子模块
+
+    ComfyUI 启动时只需要 NODE_CLASS_MAPPINGS 字典本身，
+    节点类的属性（INPUT_TYPES/FUNCTION 等）要到前端请求或图执行时才会被访问，
+    因此子模块（以及它们引入的 torch/numpy/PIL）可以推迟到第一次使用时再导入，
+    大幅缩短 ComfyUI 启动时加载本包的时间。
+    """
+
+    def __init__(self, module_name, class_name):
+        self._module_name = module_name
+        self._class_name = class_name
+        self._cls = None
+
+    def _resolve(self):
+        if self._cls is None:
+            try:
+                module = importlib.import_module("." + self._module_name, __package__)
+                self._cls = getattr(module, self._class_name)
+            except Exception as e:
+                print(f"⚠️ MISLG Tools 节点 {self._class_name} 加载失败: {e}")
+                raise
+        return self._cls
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+def __getattr__(name):
+    """PEP 562: 按需导入子模块（如 mislg_tools.vae_optimizer）"""
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __package__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_SUBMODULES = frozenset([
+    "empty_input_nodes",
+    "empty_output_nodes",
+    "vae_optimizer",
+    "image_converter",
+    "utils",
+    "image_switch",
+    "model_unloader",
+    "model_unloader_io",
+    "instant_preview_loader",
+    "ksampler_with_info",
+])
+
+# ======================================================
+# 节点注册（静态字典，包加载时零导入、零扫描）
+# ======================================================
+NODE_CLASS_MAPPINGS = {
+    "EmptyInputNode": _LazyNode("empty_input_nodes", "EmptyInputNode"),
+    "UniversalInputNode": _LazyNode("empty_input_nodes", "UniversalInputNode"),
+    "EmptyOutputNode": _LazyNode("empty_output_nodes", "EmptyOutputNode"),
+    "UniversalOutputNode": _LazyNode("empty_output_nodes", "UniversalOutputNode"),
+    "VAEDecoderOptimizer": _LazyNode("vae_optimizer", "VAEDecoderOptimizer"),
+    "SimpleVAEDecoder": _LazyNode("vae_optimizer", "SimpleVAEDecoder"),
+    "ImageDataTypeFix": _LazyNode("vae_optimizer", "ImageDataTypeFix"),
+    "ImageToPixelInput": _LazyNode("image_converter", "ImageToPixelInput"),
+    "PixelDataAnalyzer": _LazyNode("image_converter", "PixelDataAnalyzer"),
+    "AdvancedImageSaver": _LazyNode("image_converter", "AdvancedImageSaver"),
+    "MemoryOptimizer": _LazyNode("utils", "MemoryOptimizer"),
+    "WorkflowValidator": _LazyNode("utils", "WorkflowValidator"),
+    "ModelSwitch": _LazyNode("utils", "ModelSwitch"),
+    "AudioSwitch": _LazyNode("utils", "AudioSwitch"),
+    "VideoSwitch": _LazyNode("utils", "VideoSwitch"),
+    "ConditioningSwitch": _LazyNode("utils", "ConditioningSwitch"),
+    "StringSwitch": _LazyNode("utils", "StringSwitch"),
+    "IntSwitch": _LazyNode("utils", "IntSwitch"),
+    "FloatSwitch": _LazyNode("utils", "FloatSwitch"),
+    "BooleanSwitch": _LazyNode("utils", "BooleanSwitch"),
+    "MaskBinarySwitch": _LazyNode("utils", "MaskBinarySwitch"),
+    "ImageSwitchManual": _LazyNode("image_switch", "ImageSwitchManual"),
+    "ImageSwitchAdvanced": _LazyNode("image_switch", "ImageSwitchAdvanced"),
+    "ImageBlendSwitch": _LazyNode("image_switch", "ImageBlendSwitch"),
+    "UniversalModelUnloader": _LazyNode("model_unloader", "UniversalModelUnloader"),
+    "SmartMemoryManager": _LazyNode("model_unloader", "SmartMemoryManager"),
+    "UniversalModelUnloaderWithIO": _LazyNode("model_unloader_io", "UniversalModelUnloaderWithIO"),
+    "SmartModelManager": _LazyNode("model_unloader_io", "SmartModelManager"),
+    "InstantPreviewImageLoader": _LazyNode("instant_preview_loader", "InstantPreviewImageLoader"),
+    "KSamplerWithInfo": _LazyNode("ksampler_with_info", "KSamplerWithInfo"),
+    "KSamplerAdvancedWithInfo": _LazyNode("ksampler_with_info", "KSamplerAdvancedWithInfo"),
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "EmptyInputNode": "📥 空输入节点",
+    "UniversalInputNode": "📥 通用输入节点",
+    "EmptyOutputNode": "📤 空输出节点",
+    "UniversalOutputNode": "📤 通用输出节点",
+    "VAEDecoderOptimizer": "⚡ VAE 解码优化",
+    "SimpleVAEDecoder": "⚡ VAE 解码器(简单)",
+    "ImageDataTypeFix": "🔧 图像数据类型修复",
+    "ImageToPixelInput": "🔄 图像转像素",
+    "PixelDataAnalyzer": "📊 像素数据分析",
+    "AdvancedImageSaver": "💾 高级图像保存器",
+    "MemoryOptimizer": "🧹 内存优化",
+    "WorkflowValidator": "✅ 工作流验证",
+    "ModelSwitch": "🤖 模型切换器",
+    "AudioSwitch": "🎵 音频切换器",
+    "VideoSwitch": "🎬 视频切换器",
+    "ConditioningSwitch": "🔗 条件切换器",
+    "StringSwitch": "📝 文本切换器",
+    "IntSwitch": "🔢 整数切换器",
+    "FloatSwitch": "📊 浮点数切换器",
+    "BooleanSwitch": "🔘 布尔值切换器",
+    "MaskBinarySwitch": "🎭 遮罩切换器",
+    "ImageSwitchManual": "🔄 图片自动切换",
+    "ImageSwitchAdvanced": "🔄 高级图片切换",
+    "ImageBlendSwitch": "🔄 图片混合切换",
+    "UniversalModelUnloader": "💾 通用模型卸载器",
+    "SmartMemoryManager": "🤖 智能内存管理器",
+    "UniversalModelUnloaderWithIO": "💾 通用模型卸载器 (高效版)",
+    "SmartModelManager": "🤖 智能模型管理器",
+    "InstantPreviewImageLoader": "即时预览图片加载器",
+    "KSamplerWithInfo": "KSampler (With Info)",
+    "KSamplerAdvancedWithInfo": "KSampler Advanced (With Info)",
+}
+
+# ======================================================
+# 输出加载信息
+# ======================================================
+print(f"✅ MISLG Tools v1.3.4 已成功加载 (延迟导入模式)")
+print(f"   已注册 {len(NODE_CLASS_MAPPINGS)} 个节点")
+
+# ======================================================
+# 模块元信息
+# ======================================================
+__version__ = "1.3.4"
+__author__ = "MISLG"
+__description__ = "MISLG Tools - ComfyUI 自定义工具节点包 (含 MISLG 工具节点模块、即时预览图片加载器、K采样器信息模块)"
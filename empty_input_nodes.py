@@ -1,235 +1,293 @@
-"""
-空输入节点模块
-为工作流提供默认输入值，当下级节点没有连接时使用
-"""
-
-import torch
-
-class EmptyInputNode:
-    """空输入节点 - 为工作流提供默认输入值"""
-    
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "input_type": (["image", "latent", "mask", "conditioning"], {"default": "image"}),
-                "width": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
-                "height": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
-                "batch_size": ("INT", {"default": 1, "min": 1, "max": 16, "step": 1}),
-                "content_type": (["black", "white", "checkerboard", "gradient", "noise"], {"default": "black"}),
-            }
-        }
-    
-    RETURN_TYPES = ("IMAGE", "LATENT", "MASK", "STRING")
-    RETURN_NAMES = ("image", "latent", "mask", "info")
-    FUNCTION = "generate_input"
-    CATEGORY = "MISLG Tools/Input"
-    DESCRIPTION = "生成空输入数据，防止下级节点因无输入而报错"
-
-    def generate_input(self, input_type, width, height, batch_size, content_type):
-        info = f"生成 {input_type} 输入: {width}x{height}, {content_type}"
-        
-        if input_type == "image":
-            image = self.create_image(width, height, batch_size, content_type)
-            return (image, None, None, info)
-        elif input_type == "latent":
-            latent = self.create_latent(width, height, batch_size, content_type)
-            return (None, latent, None, info)
-        elif input_type == "mask":
-            mask = self.create_mask(width, height, content_type)
-            return (None, None, mask, info)
-        elif input_type == "conditioning":
-            latent = self.create_latent(width, height, batch_size, "zeros")
-            return (None, latent, None, f"{info} (使用潜在空间作为占位符)")
-        else:
-            image = self.create_image(width, height, batch_size, "black")
-            return (image, None, None, f"未知类型，返回默认图像: {info}")
-
-    def create_image(self, width, height, batch_size, content_type):
-        if content_type == "black":
-            return torch.zeros((batch_size, height, width, 3), dtype=torch.float32)
-        elif content_type == "white":
-            return torch.ones((batch_size, height, width, 3), dtype=torch.float32)
-        elif content_type == "checkerboard":
-            return self.create_checkerboard_image(width, height, batch_size)
-        elif content_type == "gradient":
-            return self.create_gradient_image(width, height, batch_size)
-        elif content_type == "noise":
-            return torch.rand((batch_size, height, width, 3), dtype=torch.float32)
-        else:
-            return torch.zeros((batch_size, height, width, 3), dtype=torch.float32)
-
-    def create_latent(self, width, height, batch_size, content_type):
-        latent_height = height // 8
-        latent_width = width // 8
-        
-        if content_type == "zeros" or content_type == "black":
-            latent = torch.zeros([batch_size, 4, latent_height, latent_width])
-        elif content_type == "ones" or content_type == "white":
-            latent = torch.ones([batch_size, 4, latent_height, latent_width])
-        elif content_type == "noise":
-            latent = torch.randn([batch_size, 4, latent_height, latent_width])
-        else:
-            latent = torch.zeros([batch_size, 4, latent_height, latent_width])
-        
-        return {"samples": latent}
-
-    def create_mask(self, width, height, content_type):
-        if content_type == "black" or content_type == "zeros":
-            return torch.zeros((height, width), dtype=torch.float32)
-        elif content_type == "white" or content_type == "ones":
-            return torch.ones((height, width), dtype=torch.float32)
-        elif content_type == "checkerboard":
-            return self.create_checkerboard_mask(width, height)
-        elif content_type == "gradient":
-            return self.create_gradient_mask(width, height)
-        elif content_type == "noise":
-            return torch.rand((height, width), dtype=torch.float32)
-        else:
-            return torch.ones((height, width), dtype=torch.float32)
-
-    def create_checkerboard_image(self, width, height, batch_size):
-        checker_size = 64
-        image = torch.zeros((height, width, 3), dtype=torch.float32)
-        
-        for y in range(height):
-            for x in range(width):
-                if ((x // checker_size) + (y // checker_size)) % 2 == 0:
-                    image[y, x] = torch.tensor([0.2, 0.2, 0.2])
-                else:
-                    image[y, x] = torch.tensor([0.8, 0.8, 0.8])
-        
-        return image.unsqueeze(0).repeat(batch_size, 1, 1, 1)
-
-    def create_gradient_image(self, width, height, batch_size):
-        image = torch.zeros((height, width, 3), dtype=torch.float32)
-        
-        for y in range(height):
-            for x in range(width):
-                r = x / width
-                g = y / height
-                b = (x + y) / (width + height)
-                image[y, x] = torch.tensor([r, g, b])
-        
-        return image.unsqueeze(0).repeat(batch_size, 1, 1, 1)
-
-    def create_checkerboard_mask(self, width, height):
-        checker_size = 32
-        mask = torch.zeros((height, width), dtype=torch.float32)
-        
-        for y in range(height):
-            for x in range(width):
-                if ((x // checker_size) + (y // checker_size)) % 2 == 0:
-                    mask[y, x] = 0.0
-                else:
-                    mask[y, x] = 1.0
-        
-        return mask
-
-    def create_gradient_mask(self, width, height):
-        mask = torch.zeros((height, width), dtype=torch.float32)
-        
-        for y in range(height):
-            mask[y, :] = y / height
-        
-        return mask
-
-class UniversalInputNode:
-    """通用输入节点 - 自动检测模式"""
-    
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "data_type": (["image", "latent", "mask"], {"default": "image"}),
-                "width": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
-                "height": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
-                "content_style": (["neutral", "visible", "random"], {"default": "visible"}),
-            }
-        }
-    
-    RETURN_TYPES = ("IMAGE", "LATENT", "MASK", "STRING")
-    RETURN_NAMES = ("image", "latent", "mask", "info")
-    FUNCTION = "generate_input"
-    CATEGORY = "MISLG Tools/Input"
-    DESCRIPTION = "通用输入节点，生成各种类型的输入数据"
-
-    def generate_input(self, data_type, width, height, content_style):
-        info = f"生成 {data_type} 输入: {width}x{height}, {content_style}"
-        
-        if data_type == "image":
-            image = self.create_content_image(width, height, content_style)
-            return (image, None, None, info)
-        elif data_type == "latent":
-            latent = self.create_content_latent(width, height, content_style)
-            return (None, latent, None, info)
-        elif data_type == "mask":
-            mask = self.create_content_mask(width, height, content_style)
-            return (None, None, mask, info)
-        else:
-            image = self.create_content_image(width, height, "visible")
-            return (image, None, None, f"未知类型，返回默认图像: {info}")
-
-    def create_content_image(self, width, height, style):
-        if style == "neutral":
-            return torch.zeros((1, height, width, 3), dtype=torch.float32)
-        elif style == "visible":
-            image = torch.zeros((height, width, 3), dtype=torch.float32)
-            center_x, center_y = width // 2, height // 2
-            image[center_y-5:center_y+5, :] = 0.5
-            image[:, center_x-5:center_x+5] = 0.5
-            marker_size = 20
-            image[:marker_size, :marker_size] = 0.8
-            image[:marker_size, -marker_size:] = 0.8
-            image[-marker_size:, :marker_size] = 0.8
-            image[-marker_size:, -marker_size:] = 0.8
-            return image.unsqueeze(0)
-        elif style == "random":
-            return torch.rand((1, height, width, 3), dtype=torch.float32)
-        else:
-            return torch.zeros((1, height, width, 3), dtype=torch.float32)
-
-    def create_content_latent(self, width, height, style):
-        latent_height = height // 8
-        latent_width = width // 8
-        
-        if style == "neutral":
-            latent = torch.zeros([1, 4, latent_height, latent_width])
-        elif style == "visible":
-            latent = torch.ones([1, 4, latent_height, latent_width]) * 0.5
-            latent += torch.randn([1, 4, latent_height, latent_width]) * 0.1
-        elif style == "random":
-            latent = torch.randn([1, 4, latent_height, latent_width])
-        else:
-            latent = torch.zeros([1, 4, latent_height, latent_width])
-        
-        return {"samples": latent}
-
-    def create_content_mask(self, width, height, style):
-        if style == "neutral":
-            return torch.ones((height, width), dtype=torch.float32)
-        elif style == "visible":
-            mask = torch.ones((height, width), dtype=torch.float32)
-            center_x, center_y = width // 2, height // 2
-            radius = min(width, height) // 4
-            for y in range(height):
-                for x in range(width):
-                    dist = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
-                    if dist <= radius:
-                        mask[y, x] = 0.0
-            return mask
-        elif style == "random":
-            return torch.rand((height, width), dtype=torch.float32)
-        else:
-            return torch.ones((height, width), dtype=torch.float32)
-
-# 节点注册
-NODE_CLASS_MAPPINGS = {
-    "EmptyInputNode": EmptyInputNode,
-    "UniversalInputNode": UniversalInputNode,
-}
-
-NODE_DISPLAY_NAME_MAPPINGS = {
-    "EmptyInputNode": "📥 空输入节点",
-    "UniversalInputNode": "📥 通用输入节点",
+"""
+空输入节点模块
+为工作流提供默认输入值，当下级节点没有连接时使用
+"""
+
+import functools
+
+import torch
+
+# ======================================================
+# 确定性张量缓存
+# 相同尺寸的零/一/棋盘格/渐变张量在多次执行间直接复用，
+# 避免重复分配和初始化（随机内容不走缓存）。
+# 缓存张量视为只读，下游需要原地修改时应先 clone。
+# ======================================================
+
+_DTYPE_MAP = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
+
+def _resolve_device(device):
+    """把 INPUT_TYPES 的 device 选项解析为 torch.device（auto 优先 CUDA）"""
+    if device == "auto":
+        return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    return torch.device(device)
+
+@functools.lru_cache(maxsize=32)
+def _cached_zeros(shape, device=None, dtype=torch.float32):
+    return torch.zeros(shape, dtype=dtype, device=device)
+
+@functools.lru_cache(maxsize=32)
+def _cached_ones(shape, device=None, dtype=torch.float32):
+    return torch.ones(shape, dtype=dtype, device=device)
+
+def _checkerboard_kernel(height: int, width: int, checker_size: int) -> torch.Tensor:
+    cy = torch.arange(height) // checker_size
+    cx = torch.arange(width) // checker_size
+    return ((cx[None, :] + cy[:, None]) & 1).to(torch.float32)
+
+def _gradient_kernel(height: int, width: int) -> torch.Tensor:
+    ys = torch.arange(height, dtype=torch.float32)
+    xs = torch.arange(width, dtype=torch.float32)
+    gy, gx = torch.meshgrid(ys, xs, indexing='ij')
+    return torch.stack([gx / width, gy / height, (gx + gy) / (width + height)], dim=-1)
+
+# 尝试用 TorchScript 把组合表达式融合为单个内核（CPU 上省掉多次算子调度），
+# 编译失败时退回普通的即时执行实现
+try:
+    _checkerboard_kernel = torch.jit.script(_checkerboard_kernel)
+    _gradient_kernel = torch.jit.script(_gradient_kernel)
+except Exception:
+    pass
+
+@functools.lru_cache(maxsize=32)
+def _cached_checkerboard_image(width, height, device=None):
+    mask = _checkerboard_kernel(height, width, 64)
+    if device is not None:
+        mask = mask.to(device)
+    return (mask.unsqueeze(-1) * 0.6 + 0.2).expand(height, width, 3)
+
+@functools.lru_cache(maxsize=32)
+def _cached_gradient_image(width, height, device=None):
+    image = _gradient_kernel(height, width)
+    if device is not None:
+        image = image.to(device)
+    return image
+
+@functools.lru_cache(maxsize=32)
+def _cached_checkerboard_mask(width, height, device=None):
+    mask = _checkerboard_kernel(height, width, 32)
+    if device is not None:
+        mask = mask.to(device)
+    return mask
+
+@functools.lru_cache(maxsize=32)
+def _cached_gradient_mask(width, height, device=None):
+    gradient = torch.arange(height, dtype=torch.float32, device=device) / height
+    return gradient[:, None].expand(height, width)
+
+@functools.lru_cache(maxsize=32)
+def _cached_visible_image(width, height, device=None):
+    center_x, center_y = width // 2, height // 2
+    marker_size = 20
+    yy = torch.arange(height, device=device)[:, None]
+    xx = torch.arange(width, device=device)[None, :]
+    center_mask = ((yy >= center_y - 5) & (yy < center_y + 5)) | \
+                  ((xx >= center_x - 5) & (xx < center_x + 5))
+    marker_mask = ((yy < marker_size) | (yy >= height - marker_size)) & \
+                  ((xx < marker_size) | (xx >= width - marker_size))
+    image = torch.zeros((height, width, 3), dtype=torch.float32, device=device)
+    image[center_mask & ~marker_mask] = 0.5
+    image[marker_mask] = 0.8
+    return image.unsqueeze(0)
+
+@functools.lru_cache(maxsize=32)
+def _cached_circle_mask(width, height, device=None):
+    center_x, center_y = width // 2, height // 2
+    radius = min(width, height) // 4
+    dy = torch.arange(height, dtype=torch.float32, device=device) - center_y
+    dx = torch.arange(width, dtype=torch.float32, device=device) - center_x
+    d2 = dy[:, None] ** 2 + dx[None, :] ** 2
+    return (d2 > radius * radius).to(torch.float32)
+
+class EmptyInputNode:
+    """空输入节点 - 为工作流提供默认输入值"""
+    
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "input_type": (["image", "latent", "mask", "conditioning"], {"default": "image"}),
+                "width": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
+                "height": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
+                "batch_size": ("INT", {"default": 1, "min": 1, "max": 16, "step": 1}),
+                "content_type": (["black", "white", "checkerboard", "gradient", "noise"], {"default": "black"}),
+                "device": (["auto", "cpu", "cuda"], {"default": "auto"}),
+                "precision": (["fp32", "fp16", "bf16"], {"default": "fp16"}),
+            }
+        }
+    
+    RETURN_TYPES = ("IMAGE", "LATENT", "MASK", "STRING")
+    RETURN_NAMES = ("image", "latent", "mask", "info")
+    FUNCTION = "generate_input"
+    CATEGORY = "MISLG Tools/Input"
+    DESCRIPTION = "生成空输入数据，防止下级节点因无输入而报错"
+
+    def generate_input(self, input_type, width, height, batch_size, content_type, device="auto", precision="fp16"):
+        info = f"生成 {input_type} 输入: {width}x{height}, {content_type}"
+        dev = _resolve_device(device)
+        latent_dtype = _DTYPE_MAP.get(precision, torch.float32)
+        
+        if input_type == "image":
+            image = self.create_image(width, height, batch_size, content_type, dev)
+            return (image, None, None, info)
+        elif input_type == "latent":
+            latent = self.create_latent(width, height, batch_size, content_type, dev, latent_dtype)
+            return (None, latent, None, info)
+        elif input_type == "mask":
+            mask = self.create_mask(width, height, content_type, dev)
+            return (None, None, mask, info)
+        elif input_type == "conditioning":
+            latent = self.create_latent(width, height, batch_size, "zeros", dev, latent_dtype)
+            return (None, latent, None, f"{info} (使用潜在空间作为占位符)")
+        else:
+            image = self.create_image(width, height, batch_size, "black", dev)
+            return (image, None, None, f"未知类型，返回默认图像: {info}")
+
+    # 内容类型 -> 生成函数 的调度表，替代逐次字符串比较的 if/elif 链
+    _IMAGE_DISPATCH = {
+        "black": lambda w, h, b, dev: _cached_zeros((b, h, w, 3), dev),
+        "white": lambda w, h, b, dev: _cached_ones((b, h, w, 3), dev),
+        "checkerboard": lambda w, h, b, dev: _cached_checkerboard_image(w, h, dev).unsqueeze(0).expand(b, -1, -1, -1),
+        "gradient": lambda w, h, b, dev: _cached_gradient_image(w, h, dev).unsqueeze(0).expand(b, -1, -1, -1),
+        "noise": lambda w, h, b, dev: torch.rand((b, h, w, 3), dtype=torch.float32, device=dev),
+    }
+
+    # 噪声潜在空间先以 fp32 生成再转换，避免半精度 randn 的质量损失
+    _LATENT_DISPATCH = {
+        "zeros": lambda b, lh, lw, dev, dt: _cached_zeros((b, 4, lh, lw), dev, dt),
+        "black": lambda b, lh, lw, dev, dt: _cached_zeros((b, 4, lh, lw), dev, dt),
+        "ones": lambda b, lh, lw, dev, dt: _cached_ones((b, 4, lh, lw), dev, dt),
+        "white": lambda b, lh, lw, dev, dt: _cached_ones((b, 4, lh, lw), dev, dt),
+        "noise": lambda b, lh, lw, dev, dt: torch.randn([b, 4, lh, lw], device=dev).to(dt),
+    }
+
+    _MASK_DISPATCH = {
+        "black": lambda w, h, dev: _cached_zeros((h, w), dev),
+        "zeros": lambda w, h, dev: _cached_zeros((h, w), dev),
+        "white": lambda w, h, dev: _cached_ones((h, w), dev),
+        "ones": lambda w, h, dev: _cached_ones((h, w), dev),
+        "checkerboard": lambda w, h, dev: _cached_checkerboard_mask(w, h, dev),
+        "gradient": lambda w, h, dev: _cached_gradient_mask(w, h, dev),
+        "noise": lambda w, h, dev: torch.rand((h, w), dtype=torch.float32, device=dev),
+    }
+
+    def create_image(self, width, height, batch_size, content_type, device=None):
+        create = self._IMAGE_DISPATCH.get(content_type, self._IMAGE_DISPATCH["black"])
+        return create(width, height, batch_size, device)
+
+    def create_latent(self, width, height, batch_size, content_type, device=None, dtype=torch.float32):
+        latent_height = height // 8
+        latent_width = width // 8
+        create = self._LATENT_DISPATCH.get(content_type, self._LATENT_DISPATCH["zeros"])
+        return {"samples": create(batch_size, latent_height, latent_width, device, dtype)}
+
+    def create_mask(self, width, height, content_type, device=None):
+        create = self._MASK_DISPATCH.get(content_type, self._MASK_DISPATCH["white"])
+        return create(width, height, device)
+
+    def create_checkerboard_image(self, width, height, batch_size, device=None):
+        image = _cached_checkerboard_image(width, height, device)
+        return image.unsqueeze(0).expand(batch_size, -1, -1, -1)
+
+    def create_gradient_image(self, width, height, batch_size, device=None):
+        image = _cached_gradient_image(width, height, device)
+        return image.unsqueeze(0).expand(batch_size, -1, -1, -1)
+
+    def create_checkerboard_mask(self, width, height, device=None):
+        return _cached_checkerboard_mask(width, height, device)
+
+    def create_gradient_mask(self, width, height, device=None):
+        return _cached_gradient_mask(width, height, device)
+
+class UniversalInputNode:
+    """通用输入节点 - 自动检测模式"""
+    
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "data_type": (["image", "latent", "mask"], {"default": "image"}),
+                "width": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
+                "height": ("INT", {"default": 512, "min": 64, "max": 4096, "step": 64}),
+                "content_style": (["neutral", "visible", "random"], {"default": "visible"}),
+                "device": (["auto", "cpu", "cuda"], {"default": "auto"}),
+                "precision": (["fp32", "fp16", "bf16"], {"default": "fp16"}),
+            }
+        }
+    
+    RETURN_TYPES = ("IMAGE", "LATENT", "MASK", "STRING")
+    RETURN_NAMES = ("image", "latent", "mask", "info")
+    FUNCTION = "generate_input"
+    CATEGORY = "MISLG Tools/Input"
+    DESCRIPTION = "通用输入节点，生成各种类型的输入数据"
+
+    def generate_input(self, data_type, width, height, content_style, device="auto", precision="fp16"):
+        info = f"生成 {data_type} 输入: {width}x{height}, {content_style}"
+        dev = _resolve_device(device)
+        latent_dtype = _DTYPE_MAP.get(precision, torch.float32)
+        
+        if data_type == "image":
+            image = self.create_content_image(width, height, content_style, dev)
+            return (image, None, None, info)
+        elif data_type == "latent":
+            latent = self.create_content_latent(width, height, content_style, dev, latent_dtype)
+            return (None, latent, None, info)
+        elif data_type == "mask":
+            mask = self.create_content_mask(width, height, content_style, dev)
+            return (None, None, mask, info)
+        else:
+            image = self.create_content_image(width, height, "visible", dev)
+            return (image, None, None, f"未知类型，返回默认图像: {info}")
+
+    def create_content_image(self, width, height, style, device=None):
+        if style == "neutral":
+            return _cached_zeros((1, height, width, 3), device)
+        elif style == "visible":
+            return _cached_visible_image(width, height, device)
+        elif style == "random":
+            return torch.rand((1, height, width, 3), dtype=torch.float32, device=device)
+        else:
+            return _cached_zeros((1, height, width, 3), device)
+
+    def create_content_latent(self, width, height, style, device=None, dtype=torch.float32):
+        latent_height = height // 8
+        latent_width = width // 8
+
+        if style == "neutral":
+            latent = _cached_zeros((1, 4, latent_height, latent_width), device, dtype)
+        elif style == "visible":
+            # 噪声先以 fp32 生成再转换，避免半精度 randn 的质量损失
+            latent = torch.ones([1, 4, latent_height, latent_width], device=device) * 0.5
+            latent += torch.randn([1, 4, latent_height, latent_width], device=device) * 0.1
+            latent = latent.to(dtype)
+        elif style == "random":
+            latent = torch.randn([1, 4, latent_height, latent_width], device=device).to(dtype)
+        else:
+            latent = _cached_zeros((1, 4, latent_height, latent_width), device, dtype)
+
+        return {"samples": latent}
+
+    def create_content_mask(self, width, height, style, device=None):
+        if style == "neutral":
+            return _cached_ones((height, width), device)
+        elif style == "visible":
+            return _cached_circle_mask(width, height, device)
+        elif style == "random":
+            return torch.rand((height, width), dtype=torch.float32, device=device)
+        else:
+            return _cached_ones((height, width), device)
+
+# 节点注册
+NODE_CLASS_MAPPINGS = {
+    "EmptyInputNode": EmptyInputNode,
+    "UniversalInputNode": UniversalInputNode,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "EmptyInputNode": "📥 空输入节点",
+    "UniversalInputNode": "📥 通用输入节点",
 }
\ No newline at end of file
@@ -10,6 +10,7 @@ import time
 import json
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PIL import Image, PngImagePlugin
 import folder_paths
@@ -26,6 +27,9 @@ class ImageToPixelInput:
                                 {"default": "pixel_array"}),
                 "normalize_range": (["0-1", "0-255", "-1 to 1"], {"default": "0-1"}),
                 "flatten_pixels": ("BOOLEAN", {"default": False}),
+            },
+            "optional": {
+                "debug_info": ("BOOLEAN", {"default": False}),
             }
         }
     
@@ -35,44 +39,69 @@ class ImageToPixelInput:
     CATEGORY = "MISLG Tools/图像"
     DESCRIPTION = "将图像转换为像素输入格式"
 
-    def convert_to_pixels(self, images, output_format, normalize_range, flatten_pixels):
-        shape_info = f"输入形状: {images.shape}, 格式: {images.dtype}\n"
-        
+    def convert_to_pixels(self, images, output_format, normalize_range, flatten_pixels, debug_info=False):
+        # shape_info 的拼接只在 debug_info 开启时进行，
+        # 视频帧等高频场景默认不再为没人消费的STRING输出付费
+        shape_info = f"输入形状: {images.shape}, 格式: {images.dtype}\n" if debug_info else ""
+
+        # dtype转换产生的是本地副本，后续缩放可以直接原地改写
+        owned = False
         if images.dtype != torch.float32:
-            images = images.float()
-            shape_info += f"转换数据类型为 float32\n"
-        
-        processed_images = self.process_images(images, output_format, normalize_range)
-        shape_info += f"处理后形状: {processed_images.shape}\n"
-        
+            # copy=False：dtype已匹配时直接返回原张量，不做多余分配
+            images = images.to(torch.float32, copy=False)
+            owned = True
+            if debug_info:
+                shape_info += f"转换数据类型为 float32\n"
+
+        processed_images = self.process_images(images, output_format, normalize_range, owned=owned)
+        if debug_info:
+            shape_info += f"处理后形状: {processed_images.shape}\n"
+
         if flatten_pixels and len(processed_images.shape) > 2:
             original_shape = processed_images.shape
+            # reshape 在张量连续时是零拷贝视图，非连续时才回退为拷贝（view 会直接报错）
+            if debug_info and not processed_images.is_contiguous():
+                shape_info += f"输入非连续，展平时将产生拷贝\n"
             if len(processed_images.shape) == 4:
-                processed_images = processed_images.view(processed_images.shape[0], -1, processed_images.shape[3])
+                processed_images = processed_images.flatten(1, -2)
             else:
-                processed_images = processed_images.view(-1, processed_images.shape[2])
-            shape_info += f"展平: {original_shape} -> {processed_images.shape}\n"
-        
-        shape_info += f"输出格式: {output_format}, 范围: {normalize_range}"
-        
+                processed_images = processed_images.flatten(0, -2)
+            if debug_info:
+                shape_info += f"展平: {original_shape} -> {processed_images.shape}\n"
+
+        if debug_info:
+            shape_info += f"输出格式: {output_format}, 范围: {normalize_range}"
+        else:
+            shape_info = "调试信息已关闭 (debug_info=False)"
+
         return (processed_images, shape_info)
 
-    def process_images(self, images, output_format, normalize_range):
+    def process_images(self, images, output_format, normalize_range, owned=False):
+        # 最多分配一个新张量：caller已拥有副本(owned)或首次写操作产生本地副本，
+        # 之后的操作全部原地进行
+        fresh = owned
+
+        # normalized_tensor 需要先把输入钳位到[0,1]再映射到目标范围；
+        # 旧顺序是先缩放后clamp(0,1)，会把0-255数据整段压平，还多走一遍内存
+        if output_format == "normalized_tensor" and normalize_range != "0-1":
+            images = images.clamp_(0.0, 1.0) if fresh else images.clamp(0.0, 1.0)
+            fresh = True
+
         if normalize_range == "0-255":
-            images = images * 255.0
+            images = images.mul_(255.0) if fresh else images.mul(255.0)
+            fresh = True
         elif normalize_range == "-1 to 1":
-            images = (images * 2.0) - 1.0
-        
-        if output_format == "normalized_tensor":
-            if normalize_range != "0-1":
-                images = torch.clamp(images, 0.0, 1.0)
-        elif output_format == "flat_pixels":
+            images = (images.mul_(2.0) if fresh else images.mul(2.0)).sub_(1.0)
+            fresh = True
+
+        if output_format == "flat_pixels":
             if len(images.shape) == 4:
-                b, h, w, c = images.shape
-                images = images.view(b, h * w, c)
+                images = images.flatten(1, 2)
         elif output_format == "rgb_values":
             if images.shape[-1] == 4:
-                images = images[..., :3]
+                # narrow 返回零拷贝视图；后续展平用的是 reshape/flatten，
+                # 非连续时才在那一步做唯一的一次拷贝
+                images = images.narrow(-1, 0, 3)
         
         return images
 
@@ -107,28 +136,42 @@ class PixelDataAnalyzer:
         stats.append("=== 像素数据统计 ===")
         stats.append(f"形状: {data.shape}")
         stats.append(f"数据类型: {data.dtype}")
-        stats.append(f"最小值: {data.min().item():.6f}")
-        stats.append(f"最大值: {data.max().item():.6f}")
-        stats.append(f"均值: {data.mean().item():.6f}")
-        stats.append(f"标准差: {data.std().item():.6f}")
-        
+        data_min, data_max = torch.aminmax(data)
+        data_std, data_mean = torch.std_mean(data)
+        # 四个标量拼成一个张量一次取回，GPU上只同步/传输一次
+        data_min, data_max, data_mean, data_std = (
+            torch.stack([data_min, data_max, data_mean, data_std]).tolist()
+        )
+        stats.append(f"最小值: {data_min:.6f}")
+        stats.append(f"最大值: {data_max:.6f}")
+        stats.append(f"均值: {data_mean:.6f}")
+        stats.append(f"标准差: {data_std:.6f}")
+
         if analyze_channels and len(data.shape) > 1 and data.shape[-1] > 1:
             stats.append("\n=== 通道统计 ===")
-            for c in range(data.shape[-1]):
-                channel_data = data[..., c]
-                stats.append(f"通道 {c}: min={channel_data.min().item():.3f}, "
-                           f"max={channel_data.max().item():.3f}, "
-                           f"mean={channel_data.mean().item():.3f}")
+            flat = data.reshape(-1, data.shape[-1])
+            ch_min, ch_max = torch.aminmax(flat, dim=0)
+            # 一次 tolist 取回全部通道统计，避免每通道三次 .item() 同步
+            ch_mins = ch_min.tolist()
+            ch_maxs = ch_max.tolist()
+            ch_means = flat.mean(dim=0).tolist()
+            for c, (mn, mx, mean) in enumerate(zip(ch_mins, ch_maxs, ch_means)):
+                stats.append(f"通道 {c}: min={mn:.3f}, "
+                           f"max={mx:.3f}, "
+                           f"mean={mean:.3f}")
         
         return "\n".join(stats)
 
     def get_data_sample(self, data):
         try:
-            sample_size = min(10, data.numel())
-            flat_data = data.flatten()
-            sample_indices = torch.linspace(0, flat_data.numel()-1, sample_size).long()
-            sample_values = flat_data[sample_indices]
-            
+            flat_data = data.reshape(-1)
+            n = flat_data.numel()
+            sample_size = min(10, n)
+            # 用纯Python算出等距索引，省掉linspace的张量分配和kernel启动
+            step = max(1, (n - 1) // 9) if n > 1 else 1
+            sample_indices = list(range(0, n, step))[:sample_size]
+            sample_values = flat_data[sample_indices].tolist()
+
             sample_str = "样本值: " + ", ".join([f"{v:.3f}" for v in sample_values])
             if data.numel() > sample_size:
                 sample_str += f" ... (共 {data.numel()} 个元素)"
@@ -146,6 +189,11 @@ class AdvancedImageSaver:
         # 创建临时预览目录
         self.temp_dir = os.path.join(self.output_dir, "temp_previews")
         os.makedirs(self.temp_dir, exist_ok=True)
+        # 编码线程池：libpng/libjpeg编码时释放GIL，批量保存可以并行
+        self._pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4))
+        # JPG合成用的uint16暂存区，按批尺寸懒分配并跨调用复用，
+        # 长时间运行时减少大块分配/释放的抖动
+        self._rgb_scratch = None
         # 清理旧的预览文件
         self.cleanup_old_previews()
 
@@ -187,17 +235,38 @@ class AdvancedImageSaver:
             one_hour_ago = current_time - 1800  # 1小时前
             
             if os.path.exists(self.temp_dir):
-                for filename in os.listdir(self.temp_dir):
-                    file_path = os.path.join(self.temp_dir, filename)
-                    if os.path.isfile(file_path):
-                        # 检查文件创建时间
-                        file_time = os.path.getctime(file_path)
-                        if file_time < one_hour_ago:
-                            os.remove(file_path)
-                            print(f"已清理旧预览文件: {filename}")
+                # scandir 的 DirEntry 缓存了类型和 stat 信息，
+                # 每个文件一次系统调用就够（listdir+isfile+getctime 要三次）
+                with os.scandir(self.temp_dir) as it:
+                    for entry in it:
+                        if entry.is_file(follow_symlinks=False):
+                            # 检查文件创建时间
+                            if entry.stat().st_ctime < one_hour_ago:
+                                os.remove(entry.path)
+                                print(f"已清理旧预览文件: {entry.name}")
         except Exception as e:
             print(f"清理预览文件时出错: {e}")
     
+    @staticmethod
+    def _save_with_linked_preview(img, save_path, save_kwargs, preview_path):
+        """保存PNG成品后用硬链接生成预览，避免对同一张图做两次deflate"""
+        img.save(save_path, **save_kwargs)
+        try:
+            if os.path.exists(preview_path):
+                os.remove(preview_path)
+            os.link(save_path, preview_path)
+        except OSError:
+            # Windows/跨设备/文件系统不支持硬链接时退回字节拷贝
+            shutil.copyfile(save_path, preview_path)
+
+    @staticmethod
+    def _save_with_preview(img, save_path, save_kwargs, preview_path, preview_metadata):
+        """同一张图的成品和预览在一个任务里顺序编码。
+        save() 会在实例上写 encoderinfo/encoderconfig，
+        两次并发 save 同一对象会互相覆盖参数，必须串行"""
+        img.save(save_path, **save_kwargs)
+        img.save(preview_path, pnginfo=preview_metadata)
+
     def save_images(self, 图像, 保存目录, 文件名前缀, 图像格式, 图像质量, 添加日期目录, 添加日期, 自动保存, WEBP无损, 关闭预览,
                    自定义路径="", prompt=None, extra_pnginfo=None):
         """保存图像 - 基于官方实现优化"""
@@ -223,6 +292,11 @@ class AdvancedImageSaver:
         else:
             final_filename_prefix = 文件名前缀
         
+        # 兼容上游给出NCHW排布的张量：先转成NHWC行主序，
+        # 后续的uint8转换和fromarray就都是线性memcpy
+        if 图像.ndim == 4 and 图像.shape[1] in (3, 4) and 图像.shape[-1] not in (3, 4):
+            图像 = 图像.permute(0, 2, 3, 1).contiguous()
+
         # 获取完整输出信息
         full_output_folder, filename, counter, subfolder, final_filename_prefix = (
             folder_paths.get_save_image_path(final_filename_prefix, output_path, 图像[0].shape[1], 图像[0].shape[0])
@@ -230,81 +304,138 @@ class AdvancedImageSaver:
         
         results = list()
         saved_files = []
-        
+        save_futures = []
+        preview_futures = []
+
         # 处理每张图像
-        for image in 图像:
-            i = 255. * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-            
-            # 生成元数据
-            metadata = PngImagePlugin.PngInfo()
-            if prompt is not None:
-                metadata.add_text("prompt", json.dumps(prompt))
-            if extra_pnginfo is not None:
-                for x in extra_pnginfo:
-                    metadata.add_text(x, json.dumps(extra_pnginfo[x]))
-            
-            # 添加生成器信息
-            metadata.add_text("generator", "MISLG AdvancedImageSaver")
-            
+        # 整批在源设备上完成缩放+钳位+uint8转换，再一次性传回host：
+        # 只有1字节/像素/通道过总线，单次异步DMA代替N次同步小拷贝
+        if 图像.dtype == torch.uint8:
+            # 某些管线直接产出uint8图像：整个缩放/钳位/转换都可以跳过
+            uint8_batch = 图像
+        else:
+            uint8_batch = 图像.mul(255.0).clamp_(0, 255).to(torch.uint8)
+        # contiguous() 只在确实非连续时调用，避免白白走一次分配+拷贝
+        if not uint8_batch.is_contiguous():
+            uint8_batch = uint8_batch.contiguous()
+        if uint8_batch.is_cuda:
+            uint8_batch = uint8_batch.to("cpu", non_blocking=True)
+            torch.cuda.synchronize()
+        np_batch = uint8_batch.cpu().numpy()
+
+        # 生成元数据——批内每张图都一样，只构建一次复用
+        prompt_json = json.dumps(prompt) if prompt is not None else None
+        metadata = PngImagePlugin.PngInfo()
+        if prompt_json is not None:
+            metadata.add_text("prompt", prompt_json)
+        if extra_pnginfo is not None:
+            for x in extra_pnginfo:
+                metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+
+        # 添加生成器信息
+        metadata.add_text("generator", "MISLG AdvancedImageSaver")
+
+        # 预览元数据同样整批复用，prompt的json串只序列化一次
+        preview_metadata = None
+        if not 关闭预览:
+            preview_metadata = PngImagePlugin.PngInfo()
+            if prompt_json is not None:
+                preview_metadata.add_text("prompt", prompt_json)
+            preview_metadata.add_text("generator", "MISLG AdvancedImageSaver Preview")
+
+        # JPG不支持alpha：在uint8批上一次性做白底合成，
+        # 比逐张走 PIL 的 split()+paste()（逐通道分配）快得多
+        if 图像格式 == 'JPG' and np_batch.shape[-1] == 4:
+            rgb = np_batch[..., :3].astype(np.uint16)
+            alpha = np_batch[..., 3:4].astype(np.uint16)
+            if self._rgb_scratch is None or self._rgb_scratch.shape != rgb.shape:
+                self._rgb_scratch = np.empty(rgb.shape, dtype=np.uint16)
+            np.multiply(rgb, alpha, out=self._rgb_scratch)
+            self._rgb_scratch += 255 * (255 - alpha)
+            self._rgb_scratch //= 255
+            np_batch = self._rgb_scratch.astype(np.uint8)
+
+        # 保证每个切片C连续，Image.fromarray走零拷贝路径
+        np_batch = np.ascontiguousarray(np_batch)
+
+        # save_kwargs 和格式分支对批内每张图都一样，移出循环只算一次
+        ext = 图像格式.lower()
+        save_kwargs = {}
+        needs_rgb_convert = False
+        if 图像格式 == 'PNG':
+            save_kwargs["pnginfo"] = metadata
+        elif 图像格式 == 'JPG':
+            save_kwargs["quality"] = 图像质量
+            save_kwargs["optimize"] = True
+            needs_rgb_convert = True
+        elif 图像格式 == 'WEBP':
+            save_kwargs["quality"] = 图像质量
+            save_kwargs["lossless"] = WEBP无损
+
+        for image_np in np_batch:
+            img = Image.fromarray(image_np)
+
             # 根据格式保存
-            file = f"{filename}_{counter:05}_.{图像格式.lower()}"
+            file = f"{filename}_{counter:05}_.{ext}"
             save_path = os.path.join(full_output_folder, file)
-            
-            save_kwargs = {}
-            if 图像格式 == 'PNG':
-                save_kwargs["pnginfo"] = metadata
-            elif 图像格式 == 'JPG':
-                save_kwargs["quality"] = 图像质量
-                save_kwargs["optimize"] = True
-                # JPG需要转换为RGB
-                if img.mode in ("RGBA", "LA"):
-                    background = Image.new("RGB", img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1])
-                    img = background
-                elif img.mode != "RGB":
-                    img = img.convert("RGB")
-            elif 图像格式 == 'WEBP':
-                save_kwargs["quality"] = 图像质量
-                save_kwargs["lossless"] = WEBP无损
-            
-            # 保存图像（如果自动保存开启）
-            if 自动保存:
-                try:
-                    img.save(save_path, **save_kwargs)
-                    saved_files.append(save_path)
-                    print(f"已保存图像: {save_path}")
-                except Exception as e:
-                    print(f"保存图像失败: {str(e)}")
-            
-            # 构建预览信息（除非关闭预览）
+
+            # JPG需要RGB（alpha已在批级合成中处理）
+            if needs_rgb_convert and img.mode != "RGB":
+                img = img.convert("RGB")
+
+            # 预览临时文件名（除非关闭预览）
             if not 关闭预览:
-                # 为预览创建临时文件
                 preview_filename = f"preview_{filename}_{counter:05}_.png"
                 preview_path = os.path.join(self.temp_dir, preview_filename)
-                
-                try:
-                    # 保存预览图像（总是保存为PNG格式）
-                    preview_img = img.copy()
-                    preview_metadata = PngImagePlugin.PngInfo()
-                    if prompt is not None:
-                        preview_metadata.add_text("prompt", json.dumps(prompt))
-                    preview_metadata.add_text("generator", "MISLG AdvancedImageSaver Preview")
-                    
-                    preview_img.save(preview_path, pnginfo=preview_metadata)
-                    
-                    # 添加预览信息到结果
-                    results.append({
-                        "filename": preview_filename,
-                        "subfolder": "temp_previews",  # 明确指定子文件夹
-                        "type": "output"
-                    })
-                    print(f"已创建预览: {preview_path}")
-                except Exception as e:
-                    print(f"创建预览失败: {str(e)}")
-            
+
+            if 自动保存 and not 关闭预览 and 图像格式 == 'PNG':
+                # 保存文件本身就是PNG，预览直接硬链接成品文件，
+                # 省掉整整一次zlib压缩（失败时退回字节拷贝，仍无需重编码）
+                future = self._pool.submit(self._save_with_linked_preview, img, save_path, save_kwargs, preview_path)
+                save_futures.append((future, save_path))
+                preview_futures.append((future, preview_filename, preview_path))
+            elif 自动保存 and not 关闭预览:
+                # 成品+预览共用同一个PIL对象时必须在同一任务里串行编码：
+                # save() 会先往实例写 encoderinfo/encoderconfig 再交给
+                # 格式插件读取，两次并发 save 会互相污染参数
+                future = self._pool.submit(self._save_with_preview, img, save_path,
+                                           save_kwargs, preview_path, preview_metadata)
+                save_futures.append((future, save_path))
+                preview_futures.append((future, preview_filename, preview_path))
+            elif 自动保存:
+                # 只保存成品——提交到编码线程池并行执行
+                save_futures.append((self._pool.submit(img.save, save_path, **save_kwargs), save_path))
+            elif not 关闭预览:
+                # 只保存预览图像（总是保存为PNG格式）
+                preview_futures.append((
+                    self._pool.submit(img.save, preview_path, pnginfo=preview_metadata),
+                    preview_filename, preview_path,
+                ))
+
             counter += 1
-        
+
+        # 等待所有编码任务完成，再按提交顺序汇总，保持与串行版一致的输出
+        for future, save_path in save_futures:
+            try:
+                future.result()
+                saved_files.append(save_path)
+                print(f"已保存图像: {save_path}")
+            except Exception as e:
+                print(f"保存图像失败: {str(e)}")
+
+        for future, preview_filename, preview_path in preview_futures:
+            try:
+                future.result()
+                # 添加预览信息到结果
+                results.append({
+                    "filename": preview_filename,
+                    "subfolder": "temp_previews",  # 明确指定子文件夹
+                    "type": "output"
+                })
+                print(f"已创建预览: {preview_path}")
+            except Exception as e:
+                print(f"创建预览失败: {str(e)}")
+
         # 生成详细信息
         detail_info = []
         detail_info.append("=== 图像保存详情 ===")
@@ -1,596 +1,822 @@
-"""
-自定义路径图片加载器 - 基于官方节点的优化版本（中文界面）
-整合官方LoadImage节点的核心功能，添加自定义路径和监控功能
-作者: MISLG
-"""
-
-import os
-import glob
-import torch
-from PIL import Image, ImageOps
-import numpy as np
-import time
-import folder_paths
-import shutil
-import hashlib
-
-class InstantPreviewImageLoader:
-    """
-    基于官方LoadImage节点的自定义图片加载器
-    保留官方节点核心功能，添加路径管理和监控功能
-    """
-    
-    # 定义支持的图片格式（与官方保持一致）
-    SUPPORTED_EXT = ['.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.tif', '.gif']
-    
-    @classmethod
-    def INPUT_TYPES(s):
-        input_dir = folder_paths.get_input_directory()
-        files = [f for f in os.listdir(input_dir) if os.path.isfile(os.path.join(input_dir, f))]
-        files = [f for f in files if any(f.lower().endswith(ext) for ext in s.SUPPORTED_EXT)]
-        
-        return {
-            "required": {
-                "图片文件": (sorted(files), {"image_upload": True}),
-                "操作模式": (["预览模式", "上传模式", "目录监控模式"], {"default": "预览模式"}),
-                "外部路径": ("STRING", {
-                    "default": "",
-                    "multiline": False,
-                    "placeholder": "文件路径(上传模式)或目录路径(监控模式)"
-                }),
-                "刷新控制": ("INT", {
-                    "default": 0,
-                    "min": 0,
-                    "max": 10000,
-                    "step": 1,
-                    "display": "button",
-                    "button_label": "🔄 刷新文件列表"
-                }),
-                "自动刷新间隔": ("INT", {
-                    "default": 0,
-                    "min": 0,
-                    "max": 300,
-                    "step": 1,
-                    "display": "slider",
-                    "tooltip": "0 = 禁用自动刷新，单位：秒"
-                }),
-                "加载限制": ("INT", {
-                    "default": 10,
-                    "min": 1,
-                    "max": 100,
-                    "step": 1,
-                    "tooltip": "目录监控模式下加载的文件数量限制"
-                }),
-                "缓存策略": (["智能缓存", "始终刷新", "禁用缓存"], {"default": "智能缓存"}),
-            },
-            "optional": {
-                "外部遮罩输入": ("MASK",),
-                "遮罩操作": (["使用外部遮罩", "覆盖外部遮罩", "忽略外部遮罩"], {"default": "使用外部遮罩"}),
-            },
-            "hidden": {
-                "unique_id": "UNIQUE_ID",
-            }
-        }
-
-    RETURN_TYPES = ("IMAGE", "MASK", "STRING")
-    RETURN_NAMES = ("image", "mask", "状态信息")
-    FUNCTION = "load_image"
-    CATEGORY = "MISLG Tools/Image"
-    DESCRIPTION = "增强版图片加载器 - 支持外部路径和目录监控"
-    OUTPUT_NODE = True
-
-    def __init__(self):
-        self.input_dir = folder_paths.get_input_directory()
-        self.output_dir = folder_paths.get_output_directory()
-        self.cache = {}
-        self.monitor_cache = {}
-        self.last_refresh = 0
-        self.last_auto_refresh = 0
-        self.monitor_last_file = None
-        self.monitor_last_time = 0
-
-    def load_image(self, 图片文件, 操作模式, 外部路径, 刷新控制=0, 自动刷新间隔=0, 
-                  加载限制=10, 缓存策略="智能缓存", 外部遮罩输入=None, 遮罩操作="使用外部遮罩", unique_id=None):
-        
-        status_info = []
-        current_time = time.time()
-        
-        # 检查刷新条件
-        needs_refresh = self._check_refresh_conditions(刷新控制, 自动刷新间隔, current_time, status_info)
-        
-        # 处理缓存策略
-        self._handle_cache_policy(缓存策略, needs_refresh, status_info)
-        
-        # 根据操作模式处理
-        if 操作模式 == "上传模式":
-            return self._handle_upload_mode(外部路径, 缓存策略, 外部遮罩输入, 
-                                          遮罩操作, status_info, needs_refresh)
-        
-        elif 操作模式 == "目录监控模式":
-            return self._handle_monitor_mode(外部路径, 加载限制, 缓存策略, 外部遮罩输入,
-                                           遮罩操作, status_info, needs_refresh, current_time)
-        
-        else:  # 预览模式
-            return self._handle_preview_mode(图片文件, 缓存策略, 外部遮罩输入, 遮罩操作, 
-                                           status_info, needs_refresh)
-
-    def _check_refresh_conditions(self, refresh_control, auto_refresh, current_time, status_info):
-        """检查刷新条件"""
-        needs_refresh = False
-        
-        if refresh_control != self.last_refresh:
-            needs_refresh = True
-            self.last_refresh = refresh_control
-            status_info.append("🔄 手动刷新已触发")
-        
-        if auto_refresh > 0 and (current_time - self.last_auto_refresh) >= auto_refresh:
-            needs_refresh = True
-            self.last_auto_refresh = current_time
-            # 显示更友好的时间描述
-            if auto_refresh < 60:
-                time_desc = f"{auto_refresh}秒"
-            else:
-                minutes = auto_refresh // 60
-                seconds = auto_refresh % 60
-                time_desc = f"{minutes}分{seconds}秒" if seconds > 0 else f"{minutes}分钟"
-            status_info.append(f"⏰ 自动刷新 ({time_desc})")
-            
-        return needs_refresh
-
-    def _handle_cache_policy(self, cache_policy, needs_refresh, status_info):
-        """处理缓存策略"""
-        if cache_policy == "始终刷新":
-            needs_refresh = True
-            status_info.append("💾 缓存策略: 始终刷新")
-        elif cache_policy == "禁用缓存":
-            self.cache.clear()
-            self.monitor_cache.clear()
-            status_info.append("💾 缓存策略: 禁用缓存")
-        else:
-            status_info.append("💾 缓存策略: 智能缓存")
-
-    def _handle_upload_mode(self, external_path, cache_policy, external_mask, 
-                          mask_operation, status_info, needs_refresh):
-        """处理上传模式 - 修复黑屏问题"""
-        if not external_path.strip():
-            return self._create_empty_output("请提供要上传的文件路径")
-        
-        # 验证外部路径
-        is_valid, validation_msg = self._validate_external_path(external_path.strip(), "upload")
-        status_info.append(validation_msg)
-        
-        if not is_valid:
-            return self._create_empty_output(f"路径验证失败: {validation_msg}")
-        
-        # 上传文件
-        uploaded_file = self._upload_external_image(external_path.strip())
-        if not uploaded_file:
-            return self._create_empty_output("文件上传失败")
-        
-        status_info.append(f"✅ 成功上传: {uploaded_file}")
-        
-        # 加载上传的图片 - 修复：使用正确的路径
-        image_path = os.path.join(self.input_dir, uploaded_file)
-        return self._load_and_process_image(image_path, uploaded_file, cache_policy, 
-                                          external_mask, mask_operation, status_info, needs_refresh)
-
-    def _handle_monitor_mode(self, external_path, load_limit, cache_policy, external_mask,
-                           mask_operation, status_info, needs_refresh, current_time):
-        """处理目录监控模式 - 改进自动刷新功能"""
-        if not external_path.strip():
-            return self._create_empty_output("请提供要监控的目录路径")
-        
-        # 验证外部路径
-        is_valid, validation_msg = self._validate_external_path(external_path.strip(), "monitor")
-        status_info.append(validation_msg)
-        
-        if not is_valid:
-            return self._create_empty_output(f"路径验证失败: {validation_msg}")
-        
-        # 获取目录文件列表
-        if needs_refresh or external_path.strip() not in self.monitor_cache:
-            files = self._get_directory_files(external_path.strip(), load_limit)
-            self.monitor_cache[external_path.strip()] = {
-                'files': files,
-                'timestamp': current_time
-            }
-            status_info.append(f"🔄 目录文件列表已刷新 (限制: {load_limit}个文件)")
-        
-        files = self.monitor_cache[external_path.strip()]['files']
-        
-        if not files:
-            return self._create_empty_output("监控目录中没有图片文件")
-        
-        # 获取最新文件
-        latest_file = files[0]
-        cache_key = f"monitor_{latest_file}"
-        
-        # 检查是否需要加载新文件
-        file_changed = latest_file != self.monitor_last_file
-        file_updated = self._is_file_updated(latest_file, current_time)
-        
-        # 如果文件有变化或需要刷新，则加载新文件
-        if (needs_refresh or file_changed or file_updated or 
-            cache_policy == "始终刷新" or cache_key not in self.cache):
-            
-            # 加载外部图片
-            image, mask, file_info = self._load_external_image(latest_file)
-            if image is None:
-                return self._create_empty_output(f"无法加载图片: {latest_file}")
-            
-            # 处理遮罩
-            final_mask = self._process_external_mask(mask, external_mask, mask_operation)
-            status_info.append(self._get_mask_status(external_mask, mask_operation))
-            
-            # 更新缓存
-            if cache_policy != "禁用缓存":
-                self.cache[cache_key] = {
-                    'image': image,
-                    'mask': final_mask
-                }
-            
-            # 更新监控状态
-            self.monitor_last_file = latest_file
-            self.monitor_last_time = current_time
-            
-            status_info.append(f"✅ 已加载最新图片: {os.path.basename(latest_file)}")
-            status_info.append(file_info)
-            
-            return (image, final_mask, "\n".join(status_info))
-        else:
-            # 使用缓存
-            status_info.append(f"使用缓存图片: {os.path.basename(latest_file)}")
-            cached_data = self.cache[cache_key]
-            return (cached_data['image'], cached_data['mask'], "\n".join(status_info))
-
-    def _is_file_updated(self, file_path, current_time):
-        """检查文件是否已更新"""
-        try:
-            if not os.path.exists(file_path):
-                return False
-            
-            # 获取文件修改时间
-            mod_time = os.path.getmtime(file_path)
-            
-            # 如果文件修改时间晚于上次加载时间，说明文件已更新
-            return mod_time > self.monitor_last_time
-        except:
-            return False
-
-    def _handle_preview_mode(self, image, cache_policy, external_mask, mask_operation,
-                           status_info, needs_refresh):
-        """处理预览模式"""
-        if not image:
-            return self._create_empty_output("未选择图片文件")
-        
-        image_path = folder_paths.get_annotated_filepath(image)
-        
-        if not os.path.exists(image_path):
-            return self._create_empty_output(f"图片文件不存在: {image}")
-        
-        cache_key = f"preview_{image}"
-        
-        if (cache_key in self.cache and not needs_refresh and cache_policy != "始终刷新"):
-            status_info.append("使用缓存图片")
-            cached_data = self.cache[cache_key]
-            return (cached_data['image'], cached_data['mask'], "\n".join(status_info))
-        
-        return self._load_and_process_image(image_path, image, cache_policy, 
-                                          external_mask, mask_operation, status_info, needs_refresh)
-
-    def _load_and_process_image(self, image_path, image_name, cache_policy, external_mask, 
-                              mask_operation, status_info, needs_refresh):
-        """加载并处理图片"""
-        try:
-            # 使用改进的方法加载图片
-            image, mask = self._load_image_improved(image_path)
-            
-            # 处理遮罩 - 修复遮罩编辑问题
-            final_mask = self._process_external_mask(mask, external_mask, mask_operation)
-            status_info.append(self._get_mask_status(external_mask, mask_operation))
-            
-            # 更新缓存
-            cache_key = f"preview_{image_name}"
-            if cache_policy != "禁用缓存":
-                self.cache[cache_key] = {
-                    'image': image,
-                    'mask': final_mask
-                }
-            
-            # 获取图片信息
-            img_info = self._get_image_info(image_path)
-            status_info.append(f"✅ 成功加载: {image_name}")
-            status_info.append(img_info)
-            
-            return (image, final_mask, "\n".join(status_info))
-            
-        except Exception as e:
-            return self._create_empty_output(f"加载图片失败: {e}")
-
-    def _load_image_improved(self, image_path):
-        """改进的图片加载方法 - 修复黑屏和遮罩问题"""
-        try:
-            i = Image.open(image_path)
-            i = ImageOps.exif_transpose(i)
-            
-            # 处理图片模式
-            if i.mode == 'I':
-                i = i.point(lambda i: i * (1 / 255))
-            image = i.convert("RGB")
-            
-            # 转换为numpy数组
-            image_array = np.array(image).astype(np.float32) / 255.0
-            image_tensor = torch.from_numpy(image_array)[None,]
-            
-            # 改进的遮罩处理 - 修复遮罩编辑问题
-            mask_tensor = self._generate_mask_improved(i, image_array.shape)
-            
-            return (image_tensor, mask_tensor)
-            
-        except Exception as e:
-            print(f"加载图片失败: {e}")
-            # 备用方法
-            try:
-                return self._load_image_fallback(image_path)
-            except Exception as e2:
-                print(f"备用加载方法也失败: {e2}")
-                raise e
-
-    def _generate_mask_improved(self, image, image_shape):
-        """改进的遮罩生成方法 - 修复遮罩编辑问题"""
-        try:
-            height, width = image_shape[1], image_shape[2]
-            
-            # 检查是否有alpha通道
-            if hasattr(image, 'getchannel') and 'A' in image.getbands():
-                try:
-                    # 提取alpha通道
-                    mask_array = np.array(image.getchannel('A')).astype(np.float32) / 255.0
-                    mask_tensor = torch.from_numpy(mask_array)
-                    
-                    # 确保mask维度正确 (H, W) -> (1, H, W)
-                    if len(mask_tensor.shape) == 2:
-                        mask_tensor = mask_tensor.unsqueeze(0)
-                    
-                    print(f"检测到Alpha通道，遮罩尺寸: {mask_tensor.shape}")
-                    return mask_tensor
-                    
-                except Exception as e:
-                    print(f"提取Alpha通道失败: {e}")
-                    # 回退到全白遮罩
-                    mask_tensor = torch.ones((1, height, width), dtype=torch.float32)
-                    return mask_tensor
-            else:
-                # 没有alpha通道，创建全白遮罩 - 修复黑屏问题
-                mask_tensor = torch.ones((1, height, width), dtype=torch.float32)
-                return mask_tensor
-                
-        except Exception as e:
-            print(f"生成遮罩失败: {e}")
-            # 出错时返回全白遮罩
-            height, width = image_shape[1], image_shape[2]
-            mask_tensor = torch.ones((1, height, width), dtype=torch.float32)
-            return mask_tensor
-
-    def _load_image_fallback(self, image_path):
-        """备用图片加载方法"""
-        try:
-            image = Image.open(image_path)
-            
-            # 转换为RGB模式
-            if image.mode == 'RGBA':
-                rgb_image = image.convert('RGB')
-            else:
-                rgb_image = image.convert('RGB')
-            
-            # 转换为numpy数组
-            image_array = np.array(rgb_image).astype(np.float32) / 255.0
-            image_tensor = torch.from_numpy(image_array)[None,]
-            
-            # 生成遮罩
-            mask_tensor = self._generate_mask_improved(image, image_array.shape)
-            
-            return image_tensor, mask_tensor
-            
-        except Exception as e:
-            print(f"备用加载方法失败: {e}")
-            raise e
-
-    def _process_external_mask(self, original_mask, external_mask, mask_operation):
-        """处理外部遮罩 - 修复遮罩编辑问题"""
-        if external_mask is None:
-            return original_mask
-        
-        # 确保外部遮罩维度正确
-        if external_mask is not None:
-            # 如果外部遮罩是3D的 (1,H,W)，保持原样
-            if len(external_mask.shape) == 3:
-                processed_external_mask = external_mask
-            # 如果外部遮罩是2D的 (H,W)，添加批次维度
-            elif len(external_mask.shape) == 2:
-                processed_external_mask = external_mask.unsqueeze(0)
-            else:
-                # 其他情况使用原始遮罩
-                processed_external_mask = original_mask
-        else:
-            processed_external_mask = original_mask
-        
-        # 根据操作模式处理遮罩
-        if mask_operation == "使用外部遮罩":
-            return processed_external_mask
-        elif mask_operation == "覆盖外部遮罩":
-            return processed_external_mask
-        elif mask_operation == "忽略外部遮罩":
-            return original_mask
-        
-        return original_mask
-
-    def _get_mask_status(self, external_mask, mask_operation):
-        """获取遮罩状态信息"""
-        if external_mask is not None:
-            if mask_operation == "使用外部遮罩":
-                return "🎭 使用外部遮罩输入"
-            elif mask_operation == "覆盖外部遮罩":
-                return "🎭 覆盖为外部遮罩"
-            elif mask_operation == "忽略外部遮罩":
-                return "🎭 忽略外部遮罩"
-        return "🎭 使用原始遮罩"
-
-    def _validate_external_path(self, path, mode):
-        """验证外部路径"""
-        if not path or not path.strip():
-            return False, "❌ 路径不能为空"
-        
-        path = path.strip()
-        
-        if mode == "upload":
-            if not os.path.exists(path):
-                return False, f"❌ 文件不存在: {path}"
-            
-            if not os.path.isfile(path):
-                return False, f"❌ 路径不是文件: {path}"
-            
-            file_ext = os.path.splitext(path)[1].lower()
-            if file_ext not in self.SUPPORTED_EXT:
-                return False, f"❌ 不支持的图片格式: {file_ext}"
-            
-            return True, f"✅ 文件路径有效: {os.path.basename(path)}"
-        
-        elif mode == "monitor":
-            if not os.path.exists(path):
-                return False, f"❌ 目录不存在: {path}"
-            
-            if not os.path.isdir(path):
-                return False, f"❌ 路径不是目录: {path}"
-            
-            return True, f"✅ 目录路径有效: {path}"
-        
-        return False, "❌ 未知的操作模式"
-
-    def _upload_external_image(self, source_path):
-        """上传外部图片到输入目录"""
-        try:
-            if not os.path.exists(source_path):
-                return None
-            
-            # 验证图片文件
-            try:
-                with Image.open(source_path) as img:
-                    img.verify()
-            except Exception:
-                return None
-            
-            filename = os.path.basename(source_path)
-            target_path = os.path.join(self.input_dir, filename)
-            
-            # 处理文件名冲突
-            counter = 1
-            name, ext = os.path.splitext(filename)
-            while os.path.exists(target_path):
-                new_filename = f"{name}_{counter}{ext}"
-                target_path = os.path.join(self.input_dir, new_filename)
-                counter += 1
-            
-            # 复制文件
-            shutil.copy2(source_path, target_path)
-            return os.path.basename(target_path)
-            
-        except Exception as e:
-            print(f"图片上传失败: {e}")
-            return None
-
-    def _load_external_image(self, image_path):
-        """直接加载外部图片"""
-        try:
-            if not os.path.exists(image_path):
-                return None, None, "文件不存在"
-            
-            image, mask = self._load_image_improved(image_path)
-            img_info = self._get_image_info(image_path)
-            
-            return image, mask, img_info
-            
-        except Exception as e:
-            return None, None, f"加载失败: {e}"
-
-    def _get_directory_files(self, directory_path, limit=10):
-        """获取目录中的图片文件"""
-        try:
-            if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
-                return []
-            
-            files = []
-            for ext in self.SUPPORTED_EXT:
-                pattern = os.path.join(directory_path, f"*{ext}")
-                files.extend(glob.glob(pattern))
-            
-            # 按修改时间排序
-            files.sort(key=os.path.getmtime, reverse=True)
-            
-            # 应用限制
-            if limit > 0 and len(files) > limit:
-                files = files[:limit]
-            
-            return files
-            
-        except Exception as e:
-            print(f"获取目录文件列表失败: {e}")
-            return []
-
-    def _get_image_info(self, image_path):
-        """获取图片信息"""
-        try:
-            with Image.open(image_path) as img:
-                dimensions = img.size
-                mode = img.mode
-                format_info = img.format
-            
-            file_size = os.path.getsize(image_path)
-            
-            info = f"尺寸: {dimensions[0]}x{dimensions[1]}\n"
-            info += f"模式: {mode}\n"
-            info += f"格式: {format_info}\n"
-            info += f"大小: {self._format_file_size(file_size)}"
-            
-            return info
-        except Exception as e:
-            return f"获取图片信息失败: {e}"
-
-    def _format_file_size(self, size_bytes):
-        """格式化文件大小"""
-        if size_bytes == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names)-1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.2f} {size_names[i]}"
-
-    def _create_empty_output(self, error_message):
-        """创建空输出"""
-        # 创建默认的黑色图像和白色mask - 修复黑屏问题
-        empty_image = torch.zeros((1, 512, 512, 3), dtype=torch.float32)
-        empty_mask = torch.ones((1, 512, 512), dtype=torch.float32)
-        print(f"即时预览图片加载器错误: {error_message}")
-        return (empty_image, empty_mask, error_message)
-
-    @classmethod
-    def IS_CHANGED(cls, 图片文件, **kwargs):
-        """检查文件是否更改（官方方法）"""
-        image_path = folder_paths.get_annotated_filepath(图片文件)
-        m = hashlib.sha256()
-        with open(image_path, 'rb') as f:
-            m.update(f.read())
-        return m.digest().hex()
-
-# 节点注册
-NODE_CLASS_MAPPINGS = {
-    "InstantPreviewImageLoader": InstantPreviewImageLoader,
-}
-
-NODE_DISPLAY_NAME_MAPPINGS = {
-    "InstantPreviewImageLoader": "即时预览图片加载器",
+"""
+自定义路径图片加载器 - 基于官方节点的优化版本（中文界面）
+整合官方LoadImage节点的核心功能，添加自定义路径和监控功能
+作者: MISLG
+"""
+
+import os
+import torch
+from PIL import Image, ImageOps
+import numpy as np
+import time
+import folder_paths
+import shutil
+import hashlib
+import collections
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# torchvision 的 read_image 走 libjpeg-turbo，JPEG 解码比 PIL 快 2-4 倍；
+# ComfyUI 运行环境通常自带 torchvision，这里仍按可选依赖处理
+try:
+    from torchvision.io import read_image, ImageReadMode
+except ImportError:
+    read_image = None
+
+@functools.lru_cache(maxsize=128)
+def _image_info(path, mtime_ns, size):
+    """按 (路径, mtime, 大小) 记忆头信息；文件一变key就变，自动失效"""
+    with Image.open(path) as img:
+        return img.size, img.mode, img.format
+
+class InstantPreviewImageLoader:
+    """
+    基于官方LoadImage节点的自定义图片加载器
+    保留官方节点核心功能，添加路径管理和监控功能
+    """
+    
+    # 定义支持的图片格式（与官方保持一致）
+    SUPPORTED_EXT = ['.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tiff', '.tif', '.gif']
+    # frozenset版本：splitext后一次成员判断，代替逐扩展名endswith
+    SUPPORTED_EXT_SET = frozenset(SUPPORTED_EXT)
+
+    # True 时 IS_CHANGED 回退为整文件内容哈希（代价是每次求值都要读完整个文件）
+    HASH_CONTENTS = False
+
+    # 共享IO线程池：文件拷贝/解码时释放GIL，可与后续张量处理重叠
+    _io_pool = ThreadPoolExecutor(max_workers=4)
+
+    # INPUT_TYPES 文件列表缓存：目录路径 -> (目录mtime_ns, 已排序文件列表)
+    _inputs_cache = {}
+
+    @classmethod
+    def INPUT_TYPES(s):
+        input_dir = folder_paths.get_input_directory()
+        # 目录mtime没变就复用上次的列表：UI反复刷新时稳态只需一次stat
+        try:
+            dir_mtime_ns = os.stat(input_dir).st_mtime_ns
+        except OSError:
+            dir_mtime_ns = None
+        cached = s._inputs_cache.get(input_dir)
+        if cached is not None and dir_mtime_ns is not None and cached[0] == dir_mtime_ns:
+            files = cached[1]
+        else:
+            # 单次scandir遍历：is_file用缓存的stat，扩展名一次集合判断
+            files = []
+            with os.scandir(input_dir) as it:
+                for entry in it:
+                    if (entry.is_file()
+                            and os.path.splitext(entry.name)[1].lower() in s.SUPPORTED_EXT_SET):
+                        files.append(entry.name)
+            files.sort()
+            s._inputs_cache[input_dir] = (dir_mtime_ns, files)
+
+        return {
+            "required": {
+                "图片文件": (files, {"image_upload": True}),
+                "操作模式": (["预览模式", "上传模式", "目录监控模式"], {"default": "预览模式"}),
+                "外部路径": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "placeholder": "文件路径(上传模式)或目录路径(监控模式)"
+                }),
+                "刷新控制": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 10000,
+                    "step": 1,
+                    "display": "button",
+                    "button_label": "🔄 刷新文件列表"
+                }),
+                "自动刷新间隔": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 300,
+                    "step": 1,
+                    "display": "slider",
+                    "tooltip": "0 = 禁用自动刷新，单位：秒"
+                }),
+                "加载限制": ("INT", {
+                    "default": 10,
+                    "min": 1,
+                    "max": 100,
+                    "step": 1,
+                    "tooltip": "目录监控模式下加载的文件数量限制"
+                }),
+                "缓存策略": (["智能缓存", "始终刷新", "禁用缓存"], {"default": "智能缓存"}),
+                "缓存上限": ("INT", {
+                    "default": 16,
+                    "min": 1,
+                    "max": 64,
+                    "step": 1,
+                    "tooltip": "LRU缓存最多保留的图片数量"
+                }),
+                "预览分辨率": (["原始", "1/2", "1/4", "1/8"], {
+                    "default": "原始",
+                    "tooltip": "JPEG可在解码阶段直接降采样，预览大图更快（其他格式忽略）"
+                }),
+            },
+            "optional": {
+                "外部遮罩输入": ("MASK",),
+                "遮罩操作": (["使用外部遮罩", "覆盖外部遮罩", "忽略外部遮罩"], {"default": "使用外部遮罩"}),
+            },
+            "hidden": {
+                "unique_id": "UNIQUE_ID",
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE", "MASK", "STRING")
+    RETURN_NAMES = ("image", "mask", "状态信息")
+    FUNCTION = "load_image"
+    CATEGORY = "MISLG Tools/Image"
+    DESCRIPTION = "增强版图片加载器 - 支持外部路径和目录监控"
+    OUTPUT_NODE = True
+
+    def __init__(self):
+        self.input_dir = folder_paths.get_input_directory()
+        self.output_dir = folder_paths.get_output_directory()
+        # LRU缓存：容量封顶，长会话下内存不再无界增长
+        self.cache = collections.OrderedDict()
+        self.monitor_cache = collections.OrderedDict()
+        self._cache_cap = 16
+        # 监控模式预取：路径 -> (提交时mtime_ns, 后台解码future)
+        self._prefetch = {}
+        self.last_refresh = 0
+        self.last_auto_refresh = 0
+        self.monitor_last_file = None
+        self.monitor_last_time = 0
+
+    # 预览分辨率选项 -> draft 降采样分母
+    _DRAFT_RATIOS = {"原始": 1, "1/2": 2, "1/4": 4, "1/8": 8}
+
+    def load_image(self, 图片文件, 操作模式, 外部路径, 刷新控制=0, 自动刷新间隔=0,
+                  加载限制=10, 缓存策略="智能缓存", 缓存上限=16, 预览分辨率="原始",
+                  外部遮罩输入=None, 遮罩操作="使用外部遮罩", unique_id=None):
+
+        self._cache_cap = 缓存上限
+        self._draft_denominator = self._DRAFT_RATIOS.get(预览分辨率, 1)
+        status_info = []
+        current_time = time.time()
+        
+        # 检查刷新条件
+        needs_refresh = self._check_refresh_conditions(刷新控制, 自动刷新间隔, current_time, status_info)
+        
+        # 处理缓存策略
+        self._handle_cache_policy(缓存策略, needs_refresh, status_info)
+        
+        # 根据操作模式处理
+        if 操作模式 == "上传模式":
+            return self._handle_upload_mode(外部路径, 缓存策略, 外部遮罩输入, 
+                                          遮罩操作, status_info, needs_refresh)
+        
+        elif 操作模式 == "目录监控模式":
+            return self._handle_monitor_mode(外部路径, 加载限制, 缓存策略, 外部遮罩输入,
+                                           遮罩操作, status_info, needs_refresh, current_time)
+        
+        else:  # 预览模式
+            return self._handle_preview_mode(图片文件, 缓存策略, 外部遮罩输入, 遮罩操作, 
+                                           status_info, needs_refresh)
+
+    def _check_refresh_conditions(self, refresh_control, auto_refresh, current_time, status_info):
+        """检查刷新条件"""
+        needs_refresh = False
+        
+        if refresh_control != self.last_refresh:
+            needs_refresh = True
+            self.last_refresh = refresh_control
+            status_info.append("🔄 手动刷新已触发")
+        
+        if auto_refresh > 0 and (current_time - self.last_auto_refresh) >= auto_refresh:
+            needs_refresh = True
+            self.last_auto_refresh = current_time
+            # 显示更友好的时间描述
+            if auto_refresh < 60:
+                time_desc = f"{auto_refresh}秒"
+            else:
+                minutes = auto_refresh // 60
+                seconds = auto_refresh % 60
+                time_desc = f"{minutes}分{seconds}秒" if seconds > 0 else f"{minutes}分钟"
+            status_info.append(f"⏰ 自动刷新 ({time_desc})")
+            
+        return needs_refresh
+
+    def _cache_key(self, prefix, name, path):
+        """构造缓存key - mtime折进key里，文件被覆盖后旧条目自然失效"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = 0
+        return f"{prefix}_{name}_{mtime_ns}_{getattr(self, '_draft_denominator', 1)}"
+
+    def _cache_put(self, cache_key, image, mask):
+        """写入缓存 - 以uint8存放，比float32省4倍内存"""
+        self.cache[cache_key] = {
+            'image': image.mul(255.0).round_().clamp_(0, 255).to(torch.uint8),
+            'mask': mask.mul(255.0).round_().clamp_(0, 255).to(torch.uint8),
+        }
+        self.cache.move_to_end(cache_key)
+        while len(self.cache) > self._cache_cap:
+            self.cache.popitem(last=False)
+
+    def _cache_get(self, cache_key):
+        """读取缓存 - 返回时才转回float32（命中时的带宽也只有1/4）"""
+        cached_data = self.cache[cache_key]
+        self.cache.move_to_end(cache_key)
+        image = cached_data['image'].to(torch.float32).mul_(1.0 / 255.0)
+        mask = cached_data['mask'].to(torch.float32).mul_(1.0 / 255.0)
+        return image, mask
+
+    def _handle_cache_policy(self, cache_policy, needs_refresh, status_info):
+        """处理缓存策略"""
+        if cache_policy == "始终刷新":
+            needs_refresh = True
+            status_info.append("💾 缓存策略: 始终刷新")
+        elif cache_policy == "禁用缓存":
+            self.cache.clear()
+            self.monitor_cache.clear()
+            status_info.append("💾 缓存策略: 禁用缓存")
+        else:
+            status_info.append("💾 缓存策略: 智能缓存")
+
+    def _handle_upload_mode(self, external_path, cache_policy, external_mask, 
+                          mask_operation, status_info, needs_refresh):
+        """处理上传模式 - 修复黑屏问题"""
+        ep = external_path.strip()
+        if not ep:
+            return self._create_empty_output("请提供要上传的文件路径")
+        
+        # 验证外部路径
+        is_valid, validation_msg = self._validate_external_path(ep, "upload")
+        status_info.append(validation_msg)
+        
+        if not is_valid:
+            return self._create_empty_output(f"路径验证失败: {validation_msg}")
+        
+        # 上传文件（校验时已解码的PIL对象一并返回，首次渲染直接复用）
+        uploaded_file, pil_img, copy_future = self._upload_external_image(ep)
+        if not uploaded_file:
+            return self._create_empty_output("文件上传失败")
+
+        status_info.append(f"✅ 成功上传: {uploaded_file}")
+
+        # 加载上传的图片 - 修复：使用正确的路径
+        # （磁盘拷贝在IO线程池里进行，与解码/张量转换重叠；
+        # copy_future传下去，在读取目标文件stat之前join）
+        image_path = os.path.join(self.input_dir, uploaded_file)
+        return self._load_and_process_image(image_path, uploaded_file, cache_policy,
+                                            external_mask, mask_operation, status_info, needs_refresh,
+                                            pil_image=pil_img, copy_future=copy_future)
+
+    def _handle_monitor_mode(self, external_path, load_limit, cache_policy, external_mask,
+                           mask_operation, status_info, needs_refresh, current_time):
+        """处理目录监控模式 - 改进自动刷新功能"""
+        ep = external_path.strip()
+        if not ep:
+            return self._create_empty_output("请提供要监控的目录路径")
+        
+        # 验证外部路径
+        is_valid, validation_msg = self._validate_external_path(ep, "monitor")
+        status_info.append(validation_msg)
+        
+        if not is_valid:
+            return self._create_empty_output(f"路径验证失败: {validation_msg}")
+        
+        # 获取目录文件列表
+        # 事件式监控的轻量替代：目录里增删/改名文件时目录mtime必然变化，
+        # 刷新前先用一次stat判断，目录没动就跳过整个扫描
+        try:
+            dir_mtime_ns = os.stat(ep).st_mtime_ns
+        except OSError:
+            dir_mtime_ns = None
+        cached_entry = self.monitor_cache.get(ep)
+        dir_unchanged = (cached_entry is not None and
+                         cached_entry.get('dir_mtime_ns') == dir_mtime_ns and
+                         cached_entry.get('limit') == load_limit)
+
+        if (needs_refresh or cached_entry is None) and not dir_unchanged:
+            files = self._get_directory_files(ep, load_limit)
+            self.monitor_cache[ep] = {
+                'files': files,
+                'timestamp': current_time,
+                'dir_mtime_ns': dir_mtime_ns,
+                'limit': load_limit,
+            }
+            self.monitor_cache.move_to_end(ep)
+            while len(self.monitor_cache) > self._cache_cap:
+                self.monitor_cache.popitem(last=False)
+            status_info.append(f"🔄 目录文件列表已刷新 (限制: {load_limit}个文件)")
+        elif needs_refresh and dir_unchanged:
+            status_info.append("🔄 目录未变化，跳过重新扫描")
+        
+        files = self.monitor_cache[ep]['files']
+        
+        if not files:
+            return self._create_empty_output("监控目录中没有图片文件")
+        
+        # 获取最新文件
+        latest_file = files[0]
+        cache_key = self._cache_key("monitor", latest_file, latest_file)
+
+        # 轮询时最新文件常在最近几个之间切换：把后续候选交给IO线程池
+        # 后台解码，下次执行到来时结果大概率已经就绪
+        self._prefetch_candidates(files[1:3])
+        
+        # 检查是否需要加载新文件
+        file_changed = latest_file != self.monitor_last_file
+        file_updated = self._is_file_updated(latest_file, current_time)
+        
+        # 如果文件有变化或需要刷新，则加载新文件
+        if (needs_refresh or file_changed or file_updated or 
+            cache_policy == "始终刷新" or cache_key not in self.cache):
+            
+            # 加载外部图片
+            image, mask, file_info = self._load_external_image(latest_file)
+            if image is None:
+                return self._create_empty_output(f"无法加载图片: {latest_file}")
+            
+            # 处理遮罩
+            final_mask = self._process_external_mask(mask, external_mask, mask_operation)
+            status_info.append(self._get_mask_status(external_mask, mask_operation))
+            
+            # 更新缓存
+            if cache_policy != "禁用缓存":
+                self._cache_put(cache_key, image, final_mask)
+
+            # 更新监控状态
+            self.monitor_last_file = latest_file
+            self.monitor_last_time = current_time
+            
+            status_info.append(f"✅ 已加载最新图片: {os.path.basename(latest_file)}")
+            status_info.append(file_info)
+            
+            return (image, final_mask, "\n".join(status_info))
+        else:
+            # 使用缓存
+            status_info.append(f"使用缓存图片: {os.path.basename(latest_file)}")
+            cached_image, cached_mask = self._cache_get(cache_key)
+            return (cached_image, cached_mask, "\n".join(status_info))
+
+    def _prefetch_candidates(self, paths):
+        """把接下来可能用到的文件提交到IO线程池后台解码"""
+        # 先丢掉不在本轮候选集里的在途条目：否则每个条目都攥着一个
+        # 解码完的float32张量（CUDA下还是锁页内存），长会话会无界增长
+        for stale in set(self._prefetch) - set(paths):
+            self._prefetch.pop(stale)[1].cancel()
+        for path in paths:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                entry = self._prefetch.pop(path, None)
+                if entry is not None:
+                    entry[1].cancel()
+                continue
+            entry = self._prefetch.get(path)
+            if entry is not None:
+                if entry[0] == mtime_ns:
+                    continue
+                # 文件已被覆盖：旧解码结果作废，重新提交
+                self._prefetch.pop(path)[1].cancel()
+            if self._cache_key("monitor", path, path) in self.cache:
+                continue
+            self._prefetch[path] = (mtime_ns,
+                                    self._io_pool.submit(self._load_image_improved, path))
+
+    def _is_file_updated(self, file_path, current_time):
+        """检查文件是否已更新"""
+        try:
+            if not os.path.exists(file_path):
+                return False
+            
+            # 获取文件修改时间
+            mod_time = os.path.getmtime(file_path)
+            
+            # 如果文件修改时间晚于上次加载时间，说明文件已更新
+            return mod_time > self.monitor_last_time
+        except:
+            return False
+
+    def _handle_preview_mode(self, image, cache_policy, external_mask, mask_operation,
+                           status_info, needs_refresh):
+        """处理预览模式"""
+        if not image:
+            return self._create_empty_output("未选择图片文件")
+        
+        image_path = folder_paths.get_annotated_filepath(image)
+        
+        if not os.path.exists(image_path):
+            return self._create_empty_output(f"图片文件不存在: {image}")
+        
+        cache_key = self._cache_key("preview", image, image_path)
+        
+        if (cache_key in self.cache and not needs_refresh and cache_policy != "始终刷新"):
+            status_info.append("使用缓存图片")
+            cached_image, cached_mask = self._cache_get(cache_key)
+            return (cached_image, cached_mask, "\n".join(status_info))
+        
+        return self._load_and_process_image(image_path, image, cache_policy, 
+                                          external_mask, mask_operation, status_info, needs_refresh)
+
+    def _load_and_process_image(self, image_path, image_name, cache_policy, external_mask,
+                              mask_operation, status_info, needs_refresh, pil_image=None,
+                              copy_future=None):
+        """加载并处理图片"""
+        try:
+            # 使用改进的方法加载图片（已有解码好的PIL对象时直接复用）
+            image, mask, header_info = self._load_image_improved(image_path, pil_image=pil_image)
+
+            # 上传模式：重叠窗口到此为止。后面要读目标文件的stat
+            # （缓存key的mtime、文件信息的大小），拷贝没落盘前读到的
+            # 是零字节占位文件，必须先join
+            if copy_future is not None:
+                try:
+                    copy_future.result()
+                except Exception as e:
+                    return self._create_empty_output(f"文件拷贝失败: {e}")
+
+            # 处理遮罩 - 修复遮罩编辑问题
+            final_mask = self._process_external_mask(mask, external_mask, mask_operation)
+            status_info.append(self._get_mask_status(external_mask, mask_operation))
+            
+            # 更新缓存
+            cache_key = self._cache_key("preview", image_name, image_path)
+            if cache_policy != "禁用缓存":
+                self._cache_put(cache_key, image, final_mask)
+            
+            # 获取图片信息（复用解码时记下的头信息，不再二次打开文件）
+            img_info = self._get_image_info(image_path, header_info)
+            status_info.append(f"✅ 成功加载: {image_name}")
+            status_info.append(img_info)
+            
+            return (image, final_mask, "\n".join(status_info))
+            
+        except Exception as e:
+            return self._create_empty_output(f"加载图片失败: {e}")
+
+    def _load_image_improved(self, image_path, pil_image=None):
+        """改进的图片加载方法 - 修复黑屏和遮罩问题"""
+        try:
+            i = pil_image if pil_image is not None else Image.open(image_path)
+
+            # 头信息在解码时顺手记下，省掉 _get_image_info 的二次打开
+            header_info = (i.size, i.mode, i.format)
+
+            k = getattr(self, '_draft_denominator', 1)
+
+            # JPEG解码快路径：torchvision直接给出uint8张量，
+            # 仅在全分辨率、EXIF方向正常时启用（JPEG不含alpha，
+            # 遮罩恒为全白）；降采样预览和其他格式仍走下方PIL路径
+            if (read_image is not None and pil_image is None and k == 1
+                    and i.format == 'JPEG'
+                    and i.getexif().get(0x0112, 1) == 1):
+                chw = read_image(image_path, ImageReadMode.RGB)
+                image_tensor = (chw.permute(1, 2, 0).contiguous()
+                                .to(torch.float32).mul_(1.0 / 255.0).unsqueeze(0))
+                if torch.cuda.is_available():
+                    image_tensor = image_tensor.pin_memory()
+                mask_tensor = torch.ones((1, image_tensor.shape[1], image_tensor.shape[2]),
+                                         dtype=torch.float32)
+                return (image_tensor, mask_tensor, header_info)
+
+            # JPEG可以让libjpeg在解码阶段直接出1/2、1/4、1/8尺寸
+            # （跳过大部分IDCT），其他格式会静默忽略 draft；
+            # 只对尚未load的句柄有效，上传模式传入的已解码对象跳过
+            if k > 1 and pil_image is None:
+                i.draft('RGB', (max(1, i.width // k), max(1, i.height // k)))
+
+            # 只有EXIF方向标记要求旋转/镜像时才走exif_transpose；
+            # 常见的正向图片省掉一次整图转置分配
+            if i.getexif().get(0x0112, 1) != 1:
+                i = ImageOps.exif_transpose(i)
+
+            # 处理图片模式
+            if i.mode == 'I':
+                i = i.point(lambda i: i * (1 / 255))
+            image = i.convert("RGB")
+
+            # 转换为numpy数组：tobytes+frombuffer 只做一次明确的拷贝
+            # （np.asarray 走 __array_interface__ 会隐藏一个中间缓冲），
+            # 乘法直接写float32输出，省掉 astype 和除法各自的全图数组
+            w, h = image.size
+            arr = np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(h, w, 3)
+            image_array = np.multiply(arr, np.float32(1.0 / 255.0), dtype=np.float32)
+            image_tensor = torch.from_numpy(np.ascontiguousarray(image_array)).unsqueeze(0)
+
+            # 下游是CUDA时放进锁页内存，之后的H2D拷贝可以异步且快~2倍
+            if torch.cuda.is_available():
+                image_tensor = image_tensor.pin_memory()
+
+            # 按模式分派遮罩生成：只有带alpha的模式（RGBA/LA/PA）
+            # 才需要走getbands/getchannel那套PIL检查，
+            # 最常见的RGB/JPEG路径直接生成全白遮罩
+            if 'A' in i.mode:
+                mask_tensor = self._generate_mask_improved(i, image_array.shape)
+            else:
+                mask_tensor = torch.ones((1, h, w), dtype=torch.float32)
+
+            return (image_tensor, mask_tensor, header_info)
+            
+        except Exception as e:
+            print(f"加载图片失败: {e}")
+            # 备用方法
+            try:
+                return self._load_image_fallback(image_path)
+            except Exception as e2:
+                print(f"备用加载方法也失败: {e2}")
+                raise e
+
+    def _generate_mask_improved(self, image, image_shape):
+        """改进的遮罩生成方法 - 修复遮罩编辑问题"""
+        try:
+            height, width = image_shape[1], image_shape[2]
+            
+            # 检查是否有alpha通道
+            if hasattr(image, 'getchannel') and 'A' in image.getbands():
+                try:
+                    # 提取alpha通道（同图像路径：单次融合转换）
+                    alpha = np.asarray(image.getchannel('A'), dtype=np.uint8)
+                    mask_array = np.multiply(alpha, np.float32(1.0 / 255.0), dtype=np.float32)
+                    mask_tensor = torch.from_numpy(mask_array)
+                    
+                    # 确保mask维度正确 (H, W) -> (1, H, W)
+                    if len(mask_tensor.shape) == 2:
+                        mask_tensor = mask_tensor.unsqueeze(0)
+                    
+                    print(f"检测到Alpha通道，遮罩尺寸: {mask_tensor.shape}")
+                    return mask_tensor
+                    
+                except Exception as e:
+                    print(f"提取Alpha通道失败: {e}")
+                    # 回退到全白遮罩
+                    mask_tensor = torch.ones((1, height, width), dtype=torch.float32)
+                    return mask_tensor
+            else:
+                # 没有alpha通道，创建全白遮罩 - 修复黑屏问题
+                mask_tensor = torch.ones((1, height, width), dtype=torch.float32)
+                return mask_tensor
+                
+        except Exception as e:
+            print(f"生成遮罩失败: {e}")
+            # 出错时返回全白遮罩
+            height, width = image_shape[1], image_shape[2]
+            mask_tensor = torch.ones((1, height, width), dtype=torch.float32)
+            return mask_tensor
+
+    def _load_image_fallback(self, image_path):
+        """备用图片加载方法"""
+        try:
+            image = Image.open(image_path)
+            header_info = (image.size, image.mode, image.format)
+
+            # 转换为RGB模式
+            if image.mode == 'RGBA':
+                rgb_image = image.convert('RGB')
+            else:
+                rgb_image = image.convert('RGB')
+            
+            # 转换为numpy数组（同主路径：单次融合转换）
+            arr = np.asarray(rgb_image, dtype=np.uint8)
+            image_array = np.multiply(arr, np.float32(1.0 / 255.0), dtype=np.float32)
+            image_tensor = torch.from_numpy(np.ascontiguousarray(image_array)).unsqueeze(0)
+            
+            # 生成遮罩
+            mask_tensor = self._generate_mask_improved(image, image_array.shape)
+
+            return image_tensor, mask_tensor, header_info
+
+        except Exception as e:
+            print(f"备用加载方法失败: {e}")
+            raise e
+
+    def _process_external_mask(self, original_mask, external_mask, mask_operation):
+        """处理外部遮罩 - 修复遮罩编辑问题"""
+        # "使用"和"覆盖"两种操作结果相同，其余情况都落回原始遮罩
+        if external_mask is None or mask_operation == "忽略外部遮罩":
+            return original_mask
+
+        # 2D (H,W) 补批次维度；3D (1,H,W) 保持原样；其他形状不受支持
+        if external_mask.dim() == 3:
+            return external_mask
+        if external_mask.dim() == 2:
+            return external_mask.unsqueeze(0)
+        return original_mask
+
+    def _get_mask_status(self, external_mask, mask_operation):
+        """获取遮罩状态信息"""
+        if external_mask is not None:
+            if mask_operation == "使用外部遮罩":
+                return "🎭 使用外部遮罩输入"
+            elif mask_operation == "覆盖外部遮罩":
+                return "🎭 覆盖为外部遮罩"
+            elif mask_operation == "忽略外部遮罩":
+                return "🎭 忽略外部遮罩"
+        return "🎭 使用原始遮罩"
+
+    def _validate_external_path(self, path, mode):
+        """验证外部路径"""
+        if not path or not path.strip():
+            return False, "❌ 路径不能为空"
+        
+        path = path.strip()
+        
+        if mode == "upload":
+            if not os.path.exists(path):
+                return False, f"❌ 文件不存在: {path}"
+            
+            if not os.path.isfile(path):
+                return False, f"❌ 路径不是文件: {path}"
+            
+            file_ext = os.path.splitext(path)[1].lower()
+            if file_ext not in self.SUPPORTED_EXT:
+                return False, f"❌ 不支持的图片格式: {file_ext}"
+            
+            return True, f"✅ 文件路径有效: {os.path.basename(path)}"
+        
+        elif mode == "monitor":
+            if not os.path.exists(path):
+                return False, f"❌ 目录不存在: {path}"
+            
+            if not os.path.isdir(path):
+                return False, f"❌ 路径不是目录: {path}"
+            
+            return True, f"✅ 目录路径有效: {path}"
+        
+        return False, "❌ 未知的操作模式"
+
+    def _upload_external_image(self, source_path):
+        """上传外部图片到输入目录"""
+        try:
+            if not os.path.exists(source_path):
+                return None, None, None
+
+            # 验证图片文件：load() 既校验又完成解码，
+            # 解码结果直接交给首次渲染复用，免得 verify+copy+open 读三遍
+            try:
+                pil_img = Image.open(source_path)
+                pil_img.load()
+            except Exception:
+                return None, None, None
+            
+            filename = os.path.basename(source_path)
+            name, ext = os.path.splitext(filename)
+
+            # 处理文件名冲突：O_CREAT|O_EXCL 原子占位，
+            # 代替 while exists 的逐次stat循环（也消除了检查与创建之间的竞态）
+            counter = 0
+            while True:
+                candidate = filename if counter == 0 else f"{name}_{counter}{ext}"
+                target_path = os.path.join(self.input_dir, candidate)
+                try:
+                    fd = os.open(target_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    os.close(fd)
+                    break
+                except FileExistsError:
+                    counter += 1
+
+            # 复制文件：copyfile 在Linux/macOS走sendfile快路径，
+            # 且不像copy2那样额外同步权限/时间戳元数据
+            # 拷贝交给IO线程池，与随后的张量转换/遮罩处理重叠进行
+            copy_future = self._io_pool.submit(shutil.copyfile, source_path, target_path)
+            return os.path.basename(target_path), pil_img, copy_future
+
+        except Exception as e:
+            print(f"图片上传失败: {e}")
+            return None, None, None
+
+    def _load_external_image(self, image_path):
+        """直接加载外部图片"""
+        try:
+            if not os.path.exists(image_path):
+                return None, None, "文件不存在"
+            
+            # 先看预取结果：mtime没变才能用，文件已被覆盖则重新解码
+            image = None
+            prefetched = self._prefetch.pop(image_path, None)
+            if prefetched is not None:
+                mtime_ns, fut = prefetched
+                try:
+                    if os.stat(image_path).st_mtime_ns == mtime_ns:
+                        image, mask, header_info = fut.result()
+                except Exception:
+                    image = None
+            if image is None:
+                image, mask, header_info = self._load_image_improved(image_path)
+            img_info = self._get_image_info(image_path, header_info)
+            
+            return image, mask, img_info
+            
+        except Exception as e:
+            return None, None, f"加载失败: {e}"
+
+    def _get_directory_files(self, directory_path, limit=10):
+        """获取目录中的图片文件"""
+        try:
+            if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
+                return []
+            
+            # 一次scandir代替8次glob：DirEntry自带缓存的stat，
+            # 排序也不用再对每个文件补一次getmtime
+            entries = []
+            with os.scandir(directory_path) as it:
+                for entry in it:
+                    if (entry.is_file()
+                            and os.path.splitext(entry.name)[1].lower() in self.SUPPORTED_EXT_SET):
+                        entries.append((entry.stat().st_mtime, entry.path))
+
+            # 按修改时间排序
+            entries.sort(reverse=True)
+            files = [path for _, path in entries]
+
+            # 应用限制
+            if limit > 0 and len(files) > limit:
+                files = files[:limit]
+
+            return files
+            
+        except Exception as e:
+            print(f"获取目录文件列表失败: {e}")
+            return []
+
+    def _get_image_info(self, image_path, header_info=None):
+        """获取图片信息"""
+        try:
+            # 一次stat同时充当缓存key和文件大小来源；
+            # 解码路径已经记下头信息时直接用，连缓存查询都不需要
+            st = os.stat(image_path)
+            if header_info is not None:
+                dimensions, mode, format_info = header_info
+            else:
+                dimensions, mode, format_info = _image_info(image_path, st.st_mtime_ns, st.st_size)
+            file_size = st.st_size
+
+            info = f"尺寸: {dimensions[0]}x{dimensions[1]}\n"
+            info += f"模式: {mode}\n"
+            info += f"格式: {format_info}\n"
+            info += f"大小: {self._format_file_size(file_size)}"
+            
+            return info
+        except Exception as e:
+            return f"获取图片信息失败: {e}"
+
+    def _format_file_size(self, size_bytes):
+        """格式化文件大小"""
+        if size_bytes == 0:
+            return "0 B"
+        
+        size_names = ["B", "KB", "MB", "GB"]
+        i = 0
+        while size_bytes >= 1024 and i < len(size_names)-1:
+            size_bytes /= 1024.0
+            i += 1
+        
+        return f"{size_bytes:.2f} {size_names[i]}"
+
+    def _create_empty_output(self, error_message):
+        """创建空输出"""
+        # 创建默认的黑色图像和白色mask - 修复黑屏问题
+        empty_image = torch.zeros((1, 512, 512, 3), dtype=torch.float32)
+        empty_mask = torch.ones((1, 512, 512), dtype=torch.float32)
+        print(f"即时预览图片加载器错误: {error_message}")
+        return (empty_image, empty_mask, error_message)
+
+    @classmethod
+    def IS_CHANGED(cls, 图片文件, **kwargs):
+        """检查是否需要重新执行 - 输入不变时让ComfyUI直接跳过本节点"""
+        # 只有"始终刷新"策略保留每次都重算的语义
+        if kwargs.get('缓存策略') == "始终刷新":
+            return float("NaN")
+        # 影响输出的模式类输入一并折进指纹：
+        # 切换操作模式/外部路径/刷新按钮都会触发重新执行
+        mode_key = (f"{kwargs.get('操作模式', '')}|{kwargs.get('外部路径', '')}|"
+                    f"{kwargs.get('刷新控制', 0)}")
+        image_path = folder_paths.get_annotated_filepath(图片文件)
+        if cls.HASH_CONTENTS:
+            with open(image_path, 'rb') as f:
+                try:
+                    # 流式哈希：峰值内存从整个文件降到内部缓冲
+                    fingerprint = hashlib.file_digest(f, 'sha256').hexdigest()
+                except AttributeError:
+                    # Python < 3.11 回退：1MiB 分块 readinto
+                    m = hashlib.sha256()
+                    buf = bytearray(1 << 20)
+                    mv = memoryview(buf)
+                    while n := f.readinto(buf):
+                        m.update(mv[:n])
+                    fingerprint = m.hexdigest()
+        else:
+            # mtime+大小+inode 足以发现文件被修改或替换，且只需一次stat，
+            # 不用把多MB的图片整个读进来再哈希
+            try:
+                st = os.stat(image_path)
+                fingerprint = f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+            except OSError:
+                fingerprint = "missing"
+        return f"{fingerprint}|{mode_key}"
+
+# 节点注册
+NODE_CLASS_MAPPINGS = {
+    "InstantPreviewImageLoader": InstantPreviewImageLoader,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "InstantPreviewImageLoader": "即时预览图片加载器",
 }
\ No newline at end of file